@@ -13,10 +13,207 @@ parser.add_argument(
     action="store_true",
     help="start app with csv storage for movies, without this argument app starts with default json storage",
 )
+parser.add_argument(
+    "-b",
+    "--binary",
+    action="store_true",
+    help="start app with binary snapshot storage for movies, loads large libraries fastest",
+)
+parser.add_argument(
+    "-z",
+    "--compress",
+    choices=["gz", "zst"],
+    help="store the json or csv database compressed, e.g. 'movie_db.json.gz'",
+)
 parser.add_argument(
     "-n",
     "--name",
     type=str,
     help="set storage name, default name is 'movie_db' ",
 )
+parser.add_argument(
+    "-s",
+    "--shards",
+    type=int,
+    help="spread the movies over SHARDS json (or csv with --csv) files in 'data/<name>_shards'",
+)
+parser.add_argument(
+    "--shard-by",
+    choices=["id", "decade"],
+    default="id",
+    help="assign movies to shards by IMDb ID hash or by decade, default is 'id'",
+)
+parser.add_argument(
+    "--no-color",
+    action="store_true",
+    help="print plain text without colors, fastest for large listings",
+)
+parser.add_argument(
+    "--background-refresh",
+    type=float,
+    nargs="?",
+    const=30,
+    metavar="DAYS",
+    help="refresh ratings older than DAYS (default 30) from OMDb in the background while the app runs",
+)
+
+subparsers = parser.add_subparsers(
+    dest="command",
+    title="commands",
+    help="run a command instead of the interactive app",
+)
+
+convert_parser = subparsers.add_parser(
+    "convert",
+    help="convert a database between json (.json), csv (.csv) and binary (.mvdb) format",
+)
+convert_parser.add_argument(
+    "source", type=str, help="database file to read, e.g. data/movie_db.json"
+)
+convert_parser.add_argument(
+    "target",
+    type=str,
+    help="database file to write, the format is chosen by its extension",
+)
+
+rebalance_parser = subparsers.add_parser(
+    "rebalance",
+    help="redistribute a sharded database (see --name) over a new number of shards",
+)
+rebalance_parser.add_argument(
+    "shard_count", type=int, help="new number of shards"
+)
+rebalance_parser.add_argument(
+    "--key",
+    choices=["id", "decade"],
+    help="switch the shard key, by default the current key is kept",
+)
+
+merge_parser = subparsers.add_parser(
+    "merge",
+    help="merge several json, csv or binary databases, de-duplicated by IMDb ID",
+)
+merge_parser.add_argument(
+    "sources", type=str, nargs="+", help="database files to merge"
+)
+merge_parser.add_argument(
+    "-o",
+    "--output",
+    type=str,
+    required=True,
+    help="database file to write, the format is chosen by its extension",
+)
+merge_parser.add_argument(
+    "--policy",
+    choices=["newest", "rating"],
+    default="newest",
+    help="keep the most recently fetched movie or the one with the highest rating, default is 'newest'",
+)
+merge_parser.add_argument(
+    "--run-size",
+    type=int,
+    default=50_000,
+    help="number of movies held in memory while sorting, default is 50000",
+)
+
+dedupe_parser = subparsers.add_parser(
+    "dedupe",
+    help="report near-duplicate movies of the selected database",
+)
+dedupe_parser.add_argument(
+    "--threshold",
+    type=float,
+    default=90,
+    help="minimum similarity score (0-100) of duplicates, default is 90",
+)
+dedupe_parser.add_argument(
+    "--merge",
+    action="store_true",
+    help="keep only the best rated movie of every duplicate group",
+)
+
+refresh_parser = subparsers.add_parser(
+    "refresh",
+    help="re-fetch ratings and posters of outdated movies from OMDb",
+)
+refresh_parser.add_argument(
+    "--max-age",
+    type=float,
+    default=30,
+    help="refresh movies fetched more than MAX_AGE days ago, default is 30",
+)
+refresh_parser.add_argument(
+    "--workers",
+    type=int,
+    default=8,
+    help="number of concurrent requests, default is 8",
+)
+refresh_parser.add_argument(
+    "--rate",
+    type=float,
+    default=10,
+    help="maximum requests per second, default is 10",
+)
+
+serve_parser = subparsers.add_parser(
+    "serve",
+    help="serve the movie website of the selected database, always up to date",
+)
+serve_parser.add_argument(
+    "--host", type=str, default="127.0.0.1", help="default is 127.0.0.1"
+)
+serve_parser.add_argument(
+    "--port", type=int, default=8000, help="default is 8000"
+)
+serve_parser.add_argument(
+    "--title",
+    type=str,
+    default="My Movies",
+    help="website heading, default is 'My Movies'",
+)
+
+filter_parser = subparsers.add_parser(
+    "filter",
+    help="print the movies matching a filter expression",
+)
+filter_parser.add_argument(
+    "expression",
+    type=str,
+    help="e.g. 'year>=1990 and rating>7.5 order by rating desc limit 50'",
+)
+
+watch_parser = subparsers.add_parser(
+    "watch",
+    help="regenerate static/index.html whenever the selected database changes",
+)
+watch_parser.add_argument(
+    "--title",
+    type=str,
+    default="My Movies",
+    help="website heading, default is 'My Movies'",
+)
+watch_parser.add_argument(
+    "--debounce",
+    type=float,
+    default=0.5,
+    metavar="SECONDS",
+    help="rebuild once no change arrived for SECONDS, default is 0.5",
+)
+watch_parser.add_argument(
+    "--poll",
+    action="store_true",
+    help="poll the database for changes instead of using inotify",
+)
+
+api_parser = subparsers.add_parser(
+    "api",
+    help="serve a JSON query API for the selected database",
+)
+api_parser.add_argument(
+    "--host", type=str, default="127.0.0.1", help="default is 127.0.0.1"
+)
+api_parser.add_argument(
+    "--port", type=int, default=8001, help="default is 8001"
+)
+
 args = parser.parse_args()
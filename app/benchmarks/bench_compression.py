@@ -0,0 +1,88 @@
+"""
+Load time and disk footprint of plain and compressed databases.
+
+Writes one generated library as JSON and CSV, plain, gzip and zstandard
+compressed (if the zstandard package is installed), then loads every file
+several times. Prints the file size, compression ratio and best load time.
+
+Slow disks can be simulated with `--read-mbps`: load times then include the
+time the file would take to read at that speed, which is what makes the
+smaller compressed files load faster from network mounted disks.
+
+Usage:
+    cd app
+    python -m benchmarks.bench_compression --movies 100000 --read-mbps 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_web_server import generate_movies
+from storage import compression
+from storage.istorage import DETAILS
+from storage.storage_factory import get_storage
+
+
+def database_names() -> list[str]:
+    suffixes = ["", compression.GZIP]
+    if compression.zstandard is not None:
+        suffixes.append(compression.ZSTD)
+    return [
+        "movies" + extension + suffix
+        for extension in (".json", ".csv")
+        for suffix in suffixes
+    ]
+
+
+def best_load_time(path: str, repeat: int) -> float:
+    storage = get_storage(path)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.get_movie_data()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movies", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--read-mbps",
+        type=float,
+        help="add the read time of the file at this disk speed in MB/s",
+    )
+    options = parser.parse_args()
+
+    movies = generate_movies(options.movies)
+    for index, movie in enumerate(movies):
+        movie.update({key: "" for key in DETAILS})
+        movie["Genre"] = ("Drama", "Comedy, Romance", "Action, Sci-Fi")[
+            index % 3
+        ]
+
+    print(f"{'file':>18} {'size MB':>9} {'ratio':>6} {'load s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        plain_sizes = {}
+        for name in database_names():
+            path = os.path.join(directory, name)
+            get_storage(path)._save_movies(movies)
+            size = os.path.getsize(path)
+            plain_size = plain_sizes.setdefault(
+                compression.strip_compression(name), size
+            )
+
+            seconds = best_load_time(path, options.repeat)
+            if options.read_mbps:
+                seconds += size / (options.read_mbps * 1_000_000)
+            print(
+                f"{name:>18} {size / 1_000_000:9.2f} "
+                + f"{plain_size / size:6.1f} {seconds:8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Latency benchmark for "movies like this" recommendations.
+
+Builds the feature matrix of a generated library with random genres and
+title words once, then times single queries and one batched query of many
+movies. Prints the build time and the p50 and p99 query latencies.
+
+Usage:
+    cd app
+    python -m benchmarks.bench_recommend --movies 100000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.bench_web_server import generate_movies
+from benchmarks.load_test_api import percentile
+from recommend import MovieRecommender
+from storage.istorage import GENRE, TITLE
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi"]
+WORDS = ["dark", "night", "star", "love", "city", "king", "return", "war"]
+
+
+def generate_library(count: int) -> list[dict]:
+    movies = generate_movies(count)
+    for movie in movies:
+        movie[TITLE] = " ".join(random.sample(WORDS, 2)) + " " + movie[TITLE]
+        movie[GENRE] = ", ".join(random.sample(GENRES, 2))
+    return movies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movies", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    options = parser.parse_args()
+
+    movies = generate_library(options.movies)
+    start = time.perf_counter()
+    recommender = MovieRecommender(movies)
+    print(
+        f"built {recommender.matrix.shape} feature matrix "
+        + f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    latencies = []
+    for _ in range(options.queries):
+        title = random.choice(movies)[TITLE]
+        start = time.perf_counter()
+        recommender.similar(title, options.limit)
+        latencies.append(time.perf_counter() - start)
+    print(
+        f"single query: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+        + f"p99 {percentile(latencies, 99) * 1000:.2f} ms"
+    )
+
+    rows = random.sample(range(len(movies)), min(64, len(movies)))
+    start = time.perf_counter()
+    recommender.similar_to_rows(rows, options.limit)
+    elapsed = time.perf_counter() - start
+    print(
+        f"batch of {len(rows)} queries: {elapsed * 1000:.2f} ms, "
+        + f"{elapsed / len(rows) * 1000:.2f} ms per movie"
+    )
+
+
+if __name__ == "__main__":
+    main()
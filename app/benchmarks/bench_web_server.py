@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for the built-in movie web server.
+
+Starts the server on a free port with a generated library and lets several
+client threads request the page, with and without conditional headers.
+
+Usage:
+    cd app
+    python -m benchmarks.bench_web_server --movies 10000 --clients 8
+"""
+
+import argparse
+import http.client
+import os
+import tempfile
+import threading
+import time
+
+from storage.storage_json import StorageJson
+from web_server import create_server
+
+
+def generate_movies(count: int) -> list[dict]:
+    return [
+        {
+            "Title": f"Movie {index}",
+            "Rating": index % 100 / 10,
+            "Year": 1900 + index % 125,
+            "Poster": f"https://example.com/poster/{index}.jpg",
+            "ID": f"tt{index:07d}",
+            "Updated": 0,
+        }
+        for index in range(count)
+    ]
+
+
+def run_clients(port: int, clients: int, requests: int, headers: dict):
+    """Send `requests` GET requests from every client thread over
+    keep-alive connections. Returns requests per second."""
+
+    def client() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        for _ in range(requests):
+            connection.request("GET", "/", headers=headers)
+            connection.getresponse().read()
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "bench.json"))
+        storage._save_movies(generate_movies(options.movies))
+
+        server = create_server(storage, port=0)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", "/")
+        response = connection.getresponse()
+        response.read()
+        etag = response.getheader("ETag")
+        connection.close()
+
+        scenarios = {
+            "full page": {},
+            "gzip": {"Accept-Encoding": "gzip"},
+            "conditional (304)": {"If-None-Match": etag},
+        }
+        print(
+            f"{options.movies} movies, {options.clients} clients, "
+            + f"{options.requests} requests each"
+        )
+        for name, headers in scenarios.items():
+            throughput = run_clients(
+                port, options.clients, options.requests, headers
+            )
+            print(f"{name:>20}: {throughput:8.0f} requests/s")
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
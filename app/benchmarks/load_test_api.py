@@ -0,0 +1,144 @@
+"""
+Load test for the JSON query API.
+
+Client threads send a mix of list, lookup, search and stats requests over
+keep-alive connections and record the latency of every request. Prints
+requests per second and the p50, p90 and p99 latencies per endpoint.
+
+By default a server with a generated library is started in-process, pass
+`--url` to test a running `python main.py api` instead.
+
+Usage:
+    cd app
+    python -m benchmarks.load_test_api --movies 100000 --clients 16
+"""
+
+import argparse
+import http.client
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+from benchmarks.bench_web_server import generate_movies
+from query_api import create_api_server
+from storage.storage_json import StorageJson
+
+
+def request_mix(movie_count: int) -> list[tuple[str, str]]:
+    """Return (endpoint name, path) pairs in the ratio of the test."""
+    index = random.randrange(max(movie_count, 1))
+    return [
+        ("list", f"/movies?offset={index % 500}&limit=50&sort=rating"),
+        ("range", "/movies?sort=year&min_year=1990&max_year=1999&limit=20"),
+        ("id", f"/movies/id/tt{index:07d}"),
+        ("title", "/movies/title/" + quote(f"Movie {index}")),
+        ("search", f"/search?q=movie%20{index % 1000}&limit=10"),
+        ("stats", "/stats"),
+    ]
+
+
+def percentile(latencies: list[float], percent: float) -> float:
+    ordered = sorted(latencies)
+    index = min(int(len(ordered) * percent / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+def run_load(host, port, clients, duration, movie_count):
+    """Send requests from all clients for `duration` seconds.
+
+    Returns:
+        (total requests, elapsed seconds, latencies per endpoint)
+    """
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client() -> None:
+        connection = http.client.HTTPConnection(host, port)
+        measured = defaultdict(list)
+        while time.perf_counter() < deadline:
+            for name, path in request_mix(movie_count):
+                start = time.perf_counter()
+                connection.request("GET", path)
+                connection.getresponse().read()
+                measured[name].append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            for name, values in measured.items():
+                latencies[name].extend(values)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = sum(len(values) for values in latencies.values())
+    return total, elapsed, latencies
+
+
+def print_report(total, elapsed, latencies) -> None:
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.0f} req/s")
+    print(f"{'endpoint':>10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    everything = []
+    for name, values in sorted(latencies.items()):
+        everything.extend(values)
+        print(
+            f"{name:>10} {statistics.median(values) * 1000:8.2f} "
+            + f"{percentile(values, 90) * 1000:8.2f} "
+            + f"{percentile(values, 99) * 1000:8.2f}"
+        )
+    print(
+        f"{'all':>10} {statistics.median(everything) * 1000:8.2f} "
+        + f"{percentile(everything, 90) * 1000:8.2f} "
+        + f"{percentile(everything, 99) * 1000:8.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movies", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--url", type=str, help="e.g. http://127.0.0.1:8001")
+    options = parser.parse_args()
+
+    if options.url:
+        url = urlsplit(options.url)
+        report = run_load(
+            url.hostname,
+            url.port or 80,
+            options.clients,
+            options.duration,
+            options.movies,
+        )
+        print_report(*report)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "load.json"))
+        storage._save_movies(generate_movies(options.movies))
+        server = create_api_server(storage, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        report = run_load(
+            "127.0.0.1",
+            server.server_address[1],
+            options.clients,
+            options.duration,
+            options.movies,
+        )
+        print_report(*report)
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Near-duplicate detection for a movie library.
+
+Comparing every title with every other title is O(n²). Instead, movies are
+grouped into blocks that share a candidate key:
+- the IMDb ID,
+- a normalized title key ("X, The", "The X" and "x" all become "x"),
+- min-hash signatures of the character trigrams of the normalized title,
+  so variant spellings land in a common block with high probability.
+
+Only pairs inside a block are scored with RapidFuzz. Duplicate pairs are
+joined into clusters that can be merged in one batched write.
+
+Usage:
+    Call `find_duplicates(movies)` and optionally
+    `merge_duplicates(storage, movies, clusters)`.
+"""
+
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import combinations
+
+from rapidfuzz import fuzz
+
+from storage.istorage import ID, RATING, TITLE, YEAR
+
+DEFAULT_THRESHOLD = 90
+SIGNATURE_SEEDS = (0x9E3779B9, 0x85EBCA6B, 0xC2B2AE35)
+# n-gram blocks with more members carry no signal and would make
+# scoring quadratic again
+MAX_BLOCK_SIZE = 200
+ARTICLES = ("the", "a", "an")
+
+
+@dataclass
+class DuplicateCluster:
+    # positions of the movies in the scanned movie list
+    indexes: list[int] = field(default_factory=list)
+    movies: list[dict] = field(default_factory=list)
+    # (title, title, score) for every matched pair
+    pairs: list[tuple[str, str, float]] = field(default_factory=list)
+
+
+def normalize_title(title: str) -> str:
+    """Return a comparison key for a title: casefolded, without accents,
+    punctuation and leading or trailing articles ("Matrix, The")."""
+    title = unicodedata.normalize("NFKD", title.casefold())
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    title = re.sub(r"[^\w\s,]", " ", title)
+
+    head, _, tail = title.rpartition(",")
+    if head and tail.strip() in ARTICLES:
+        title = head
+    words = title.replace(",", " ").split()
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def ngram_signature(normalized_title: str, n: int = 3) -> list[int]:
+    """Return one min-hash of the character n-grams per seed."""
+    text = normalized_title.replace(" ", "")
+    ngrams = {text[i : i + n] for i in range(max(len(text) - n + 1, 1))}
+    hashes = [zlib.crc32(ngram.encode("utf-8")) for ngram in ngrams]
+    return [min(value ^ seed for value in hashes) for seed in SIGNATURE_SEEDS]
+
+
+def _blocks(movies: list[dict], normalized: list[str]) -> list[list[int]]:
+    blocks = defaultdict(list)
+    for index, movie in enumerate(movies):
+        if movie[ID]:
+            blocks[("id", movie[ID])].append(index)
+        blocks[("title", normalized[index])].append(index)
+        signature = ngram_signature(normalized[index])
+        for seed_index, value in enumerate(signature):
+            blocks[("ngram", seed_index, value)].append(index)
+
+    return [
+        members
+        for key, members in blocks.items()
+        if len(members) > 1
+        and (key[0] != "ngram" or len(members) <= MAX_BLOCK_SIZE)
+    ]
+
+
+def _score(first: dict, second: dict, first_key: str, second_key: str):
+    """Return the similarity of two movies from 0 to 100."""
+    if first[ID] and first[ID] == second[ID]:
+        return 100.0
+    if first[ID] and second[ID]:
+        # two different IMDb entries are different movies,
+        # like remakes with the same title
+        return 0.0
+    if abs(int(first[YEAR]) - int(second[YEAR])) > 1:
+        return 0.0
+    return fuzz.token_sort_ratio(first_key, second_key)
+
+
+def find_duplicates(
+    movies: list[dict], threshold: float = DEFAULT_THRESHOLD
+) -> list[DuplicateCluster]:
+    """Find clusters of movies that are probably the same movie.
+
+    Arguments:
+        movies -- all movies of the library
+
+    Keyword Arguments:
+        threshold -- minimum RapidFuzz score of a duplicate (default: {90})
+    """
+    normalized = [normalize_title(movie[TITLE]) for movie in movies]
+    parent = list(range(len(movies)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    scored = set()
+    pairs = []
+    for members in _blocks(movies, normalized):
+        for first, second in combinations(members, 2):
+            if (first, second) in scored:
+                continue
+            scored.add((first, second))
+            score = _score(
+                movies[first],
+                movies[second],
+                normalized[first],
+                normalized[second],
+            )
+            if score >= threshold:
+                pairs.append((first, second, score))
+                parent[find(first)] = find(second)
+
+    clusters = defaultdict(DuplicateCluster)
+    for index in range(len(movies)):
+        cluster = clusters[find(index)]
+        cluster.indexes.append(index)
+        cluster.movies.append(movies[index])
+    for first, second, score in pairs:
+        clusters[find(first)].pairs.append(
+            (movies[first][TITLE], movies[second][TITLE], score)
+        )
+
+    return [cluster for cluster in clusters.values() if cluster.pairs]
+
+
+def choose_survivor(cluster: DuplicateCluster) -> int:
+    """Return the index of the movie to keep: the one with
+    an IMDb ID and the highest rating."""
+    index, _ = max(
+        zip(cluster.indexes, cluster.movies),
+        key=lambda entry: (bool(entry[1][ID]), entry[1][RATING]),
+    )
+    return index
+
+
+def merge_duplicates(
+    storage, movies: list[dict], clusters: list[DuplicateCluster]
+) -> int:
+    """Remove all but one movie of every cluster with a single write.
+
+    Arguments:
+        storage -- the storage the movies were loaded from
+        movies -- the movie list passed to `find_duplicates`
+        clusters -- the clusters found in `movies`
+
+    Returns:
+        int: Number of removed movies.
+    """
+    removed = set()
+    for cluster in clusters:
+        survivor = choose_survivor(cluster)
+        removed.update(
+            index for index in cluster.indexes if index != survivor
+        )
+
+    storage._save_movies([
+        movie for index, movie in enumerate(movies) if index not in removed
+    ])
+    return len(removed)
@@ -0,0 +1,278 @@
+"""
+Inverted full-text index over the movie metadata.
+
+Every field (title, genre, director, actors, plot) keeps a posting list per
+token: token -> {movie key: term frequency}. Movies are added and removed
+incrementally, the index is persisted as JSON next to the database and
+reused as long as the database was not changed by someone else.
+
+Query syntax:
+    star wars              movies matching all words in any field
+    genre:drama            words limited to a field
+    director:nolan actor:caine
+    drama OR comedy        either word
+    -horror                exclude movies matching a word
+
+Results are ranked by TF-IDF weighted by field, then by rating.
+
+Usage:
+    index = FullTextIndex.for_storage(storage)
+    index.search("genre:drama director:nolan")
+"""
+
+import json
+import math
+import os
+import re
+from collections import defaultdict
+
+from storage.istorage import (
+    ACTORS,
+    DIRECTOR,
+    GENRE,
+    PLOT,
+    RATING,
+    TITLE,
+    YEAR,
+    movie_key,
+)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index.json"
+# query field name -> (movie key, ranking weight)
+FIELDS = {
+    "title": (TITLE, 3.0),
+    "genre": (GENRE, 1.5),
+    "director": (DIRECTOR, 2.0),
+    "actors": (ACTORS, 2.0),
+    "plot": (PLOT, 1.0),
+}
+FIELD_ALIASES = {"actor": "actors", "cast": "actors"}
+TOKEN_PATTERN = re.compile(r"\w+")
+DEFAULT_RESULTS = 20
+
+
+class QuerySyntaxError(ValueError):
+    """Raised for queries with unknown fields or without words."""
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def index_path_for(storage) -> str:
+    """Return the index file that belongs to the database of `storage`."""
+    if hasattr(storage, "directory"):
+        return os.path.join(storage.directory, "fulltext" + INDEX_SUFFIX)
+    return storage.file_path + INDEX_SUFFIX
+
+
+class FullTextIndex:
+    """Posting lists per field and token.
+
+    Attributes:
+        postings (dict): field -> token -> {movie key: term frequency}
+        documents (dict): movie key -> title, year, rating and the tokens
+        of every field, needed to remove a movie again.
+    """
+
+    def __init__(self, path=None, last_modified=0.0) -> None:
+        self.path = path
+        self.last_modified = last_modified
+        self.postings = {field: defaultdict(dict) for field in FIELDS}
+        self.documents = {}
+
+    @classmethod
+    def for_storage(cls, storage) -> "FullTextIndex":
+        """Load the persisted index of `storage`, or build and save
+        a new one if it is missing or outdated."""
+        path = index_path_for(storage)
+        last_modified = storage.last_modified()
+        index = cls.load(path)
+        if index is None or index.last_modified != last_modified:
+            index = cls(path, last_modified)
+            for movie in storage.get_movie_data():
+                index.add(movie)
+            index.save()
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> "FullTextIndex | None":
+        try:
+            with open(path, "r") as file:
+                data = json.loads(file.read())
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+
+        index = cls(path, data["last_modified"])
+        index.documents = data["documents"]
+        for field, tokens in data["postings"].items():
+            index.postings[field].update(tokens)
+        return index
+
+    def save(self, last_modified=None) -> None:
+        """Persist the index. Pass the new modification time of the
+        database after changing both, so the index stays valid."""
+        if last_modified is not None:
+            self.last_modified = last_modified
+        if self.path is None:
+            return
+        with open(self.path, "w") as file:
+            file.write(
+                json.dumps({
+                    "version": INDEX_VERSION,
+                    "last_modified": self.last_modified,
+                    "documents": self.documents,
+                    "postings": self.postings,
+                })
+            )
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, movie: dict) -> None:
+        """Index a movie, replacing an older version of it."""
+        key = movie_key(movie)
+        if key in self.documents:
+            self.remove(key)
+
+        fields = {}
+        for field, (movie_field, _) in FIELDS.items():
+            tokens = tokenize(str(movie.get(movie_field, "")))
+            fields[field] = tokens
+            for token in tokens:
+                posting = self.postings[field][token]
+                posting[key] = posting.get(key, 0) + 1
+
+        self.documents[key] = {
+            "title": movie[TITLE],
+            "year": movie[YEAR],
+            "rating": movie[RATING],
+            "fields": fields,
+        }
+
+    def remove(self, key: str) -> None:
+        """Remove a movie by its key from all posting lists."""
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for field, tokens in document["fields"].items():
+            for token in set(tokens):
+                posting = self.postings[field].get(token)
+                if posting is None:
+                    continue
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[field][token]
+
+    def remove_title(self, title: str) -> None:
+        """Remove all movies with `title`, ignoring case."""
+        title = title.casefold()
+        for key, document in list(self.documents.items()):
+            if document["title"].casefold() == title:
+                self.remove(key)
+
+    def _match(self, field: str | None, token: str) -> dict[str, float]:
+        """Return movie key -> score for one query word."""
+        fields = [field] if field else list(FIELDS)
+        scores = defaultdict(float)
+        for name in fields:
+            posting = self.postings[name].get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + len(self.documents) / len(posting))
+            weight = FIELDS[name][1]
+            for key, frequency in posting.items():
+                scores[key] += weight * idf * (1 + math.log(frequency))
+        return scores
+
+    def _parse(self, query: str) -> tuple[list, list]:
+        """Split a query into AND-ed groups of OR-ed (field, token) terms
+        and excluded terms.
+
+        Raises:
+            QuerySyntaxError: For unknown fields or an empty query.
+        """
+        groups = []
+        excluded = []
+        join_next = False
+        for word in query.split():
+            if word == "OR":
+                join_next = bool(groups)
+                continue
+
+            negate = word.startswith("-")
+            word = word.lstrip("-")
+            field = None
+            if ":" in word:
+                field, word = word.split(":", 1)
+                field = FIELD_ALIASES.get(field.lower(), field.lower())
+                if field not in FIELDS:
+                    raise QuerySyntaxError(
+                        f"Unknown field '{field}', "
+                        + f"use one of: {', '.join(FIELDS)}"
+                    )
+            terms = [(field, token) for token in tokenize(word)]
+            if not terms:
+                continue
+
+            if negate:
+                excluded.extend(terms)
+            elif join_next:
+                groups[-1].extend(terms)
+            else:
+                # words like "sci-fi" become several tokens that all match
+                groups.extend([term] for term in terms)
+            join_next = False
+
+        if not groups:
+            raise QuerySyntaxError("Query needs at least one word to find!")
+        return groups, excluded
+
+    def search(self, query: str, limit=DEFAULT_RESULTS) -> list[dict]:
+        """Return the best matching movies as dictionaries with
+        title, year, rating and score.
+
+        Raises:
+            QuerySyntaxError: If the query cannot be parsed.
+        """
+        groups, excluded = self._parse(query)
+
+        # rarest group first keeps the intersection small
+        group_scores = []
+        for group in groups:
+            scores = defaultdict(float)
+            for field, token in group:
+                for key, score in self._match(field, token).items():
+                    scores[key] += score
+            group_scores.append(scores)
+        group_scores.sort(key=len)
+
+        total = dict(group_scores[0])
+        for scores in group_scores[1:]:
+            total = {
+                key: score + scores[key]
+                for key, score in total.items()
+                if key in scores
+            }
+        for field, token in excluded:
+            for key in self._match(field, token):
+                total.pop(key, None)
+
+        ranked = sorted(
+            total.items(),
+            key=lambda item: (item[1], self.documents[item[0]]["rating"]),
+            reverse=True,
+        )
+        return [
+            {
+                "key": key,
+                "title": self.documents[key]["title"],
+                "year": self.documents[key]["year"],
+                "rating": self.documents[key]["rating"],
+                "score": score,
+            }
+            for key, score in ranked[:limit]
+        ]
@@ -1,9 +1,9 @@
 """
 Main entry point for launching the MovieApp.
 
-Initializes storage, sets up the MovieApp with CSV- or JSON-based movie data,
-and runs the application. To switch to JSON storage, modify the storage
-initialization and uncomment the relevant import.
+Initializes storage, sets up the MovieApp with CSV-, JSON- or binary-based
+movie data, and runs the application. Commands like `convert` run without
+starting the interactive app.
 
 Usage:
     Run this script to start the MovieApp with current storage settings.
@@ -11,34 +11,194 @@ Usage:
 
 import os
 from arg_handling import args
+from dedupe import find_duplicates, merge_duplicates
+from merge import merge_databases
+from query_api import serve_api
+from refresh import refresh_movies, start_background_refresh
 from movie_app import MovieApp
+from movie_filter import FilterSyntaxError, compile_query
+import pager
+from storage.storage_binary import StorageBinary
 from storage.storage_csv import StorageCsv
+from storage.storage_factory import convert_storage
 from storage.storage_json import StorageJson
+from storage.storage_sharded import StorageSharded
+import utility as helper
+from watch import watch
+from web_server import serve
 
 
 def main() -> None:
+    if args.no_color:
+        helper.set_color(False)
+
+    if args.command == "convert":
+        return convert(args.source, args.target)
+    if args.command == "merge":
+        return merge(args.sources, args.output, args.policy, args.run_size)
+
+    storage = open_storage()
+
+    if args.command == "rebalance":
+        return rebalance(storage, args.shard_count, args.key)
+    if args.command == "dedupe":
+        return dedupe(storage, args.threshold, args.merge)
+    if args.command == "refresh":
+        return refresh(storage, args.max_age, args.workers, args.rate)
+    if args.command == "serve":
+        return serve(storage, args.host, args.port, args.title)
+    if args.command == "api":
+        return serve_api(storage, args.host, args.port)
+    if args.command == "filter":
+        return print_filtered(storage, args.expression)
+    if args.command == "watch":
+        return watch(
+            storage, args.title, debounce=args.debounce, polling=args.poll
+        )
+
+    if args.background_refresh is not None:
+        start_background_refresh(
+            storage, max_age_days=args.background_refresh
+        )
+
+    movie_app = MovieApp(storage)
+    movie_app.run()
+
+
+def open_storage():
+    """Open the storage selected by the command line arguments."""
     STORAGE_PATH = "data"
 
     # default db name
     db_name = "movie_db"
     # default file extension
     ext = ".json"
+    # compressed json or csv databases end with .gz or .zst
+    compression = f".{args.compress}" if args.compress else ""
 
     if args.name:
         db_name = args.name
 
     # default storage is json
-    db_path = get_file_path(STORAGE_PATH, db_name, ext)
+    db_path = get_file_path(STORAGE_PATH, db_name, ext + compression)
 
-    if args.csv:
+    if args.shards or args.command == "rebalance":
+        shard_ext = ".csv" if args.csv else ".json"
+        shard_path = get_file_path(STORAGE_PATH, db_name, "_shards")
+        storage = StorageSharded(
+            shard_path, args.shards, args.shard_by, shard_ext
+        )
+    elif args.csv:
         ext = ".csv"
-        db_path = get_file_path(STORAGE_PATH, db_name, ext)
+        db_path = get_file_path(STORAGE_PATH, db_name, ext + compression)
         storage = StorageCsv(db_path)
+    elif args.binary:
+        ext = ".mvdb"
+        db_path = get_file_path(STORAGE_PATH, db_name, ext)
+        storage = StorageBinary(db_path)
     else:
         storage = StorageJson(db_path)
 
-    movie_app = MovieApp(storage)
-    movie_app.run()
+    return storage
+
+
+def convert(source_path, target_path) -> None:
+    """Translate a database file into the format of the target extension."""
+    try:
+        count = convert_storage(source_path, target_path)
+    except (FileNotFoundError, ValueError) as error:
+        helper.print_color(f"{error}", "red")
+    else:
+        helper.print_color(
+            f"Converted {count} movies from '{source_path}' to '{target_path}'.",
+            "green",
+        )
+
+
+def merge(source_paths, target_path, policy, run_size) -> None:
+    """Merge several databases into one, de-duplicated by IMDb ID."""
+    try:
+        result = merge_databases(source_paths, target_path, policy, run_size)
+    except (FileNotFoundError, ValueError) as error:
+        helper.print_color(f"{error}", "red")
+    else:
+        helper.print_color(
+            f"Merged {result.read} movies into {result.written} movies "
+            + f"in '{target_path}', {result.duplicates} duplicates resolved.",
+            "green",
+        )
+
+
+def rebalance(storage, shard_count, shard_key) -> None:
+    """Redistribute a sharded database over `shard_count` shards."""
+    try:
+        storage.rebalance(shard_count, shard_key)
+    except ValueError as error:
+        helper.print_color(f"{error}", "red")
+    else:
+        helper.print_color(
+            f"Rebalanced movies into {storage.shard_count} shards "
+            + f"by {storage.shard_key}.",
+            "green",
+        )
+
+
+def dedupe(storage, threshold, merge_movies) -> None:
+    """Print groups of near-duplicate movies and optionally merge them."""
+    movies = storage.get_movie_data()
+    clusters = find_duplicates(movies, threshold)
+    if not clusters:
+        helper.print_color("No duplicates found.", "green")
+        return
+
+    for cluster in clusters:
+        helper.print_color(
+            " | ".join(
+                f"{movie['Title']} ({movie['Year']}) {movie['ID']}"
+                for movie in cluster.movies
+            ),
+            "blue",
+        )
+        for first, second, score in cluster.pairs:
+            print(f"\t{score:5.1f}  {first} ~ {second}")
+    print(f"{len(clusters)} duplicate groups found")
+
+    if merge_movies:
+        removed = merge_duplicates(storage, movies, clusters)
+        helper.print_color(f"Removed {removed} duplicate movies.", "green")
+
+
+def refresh(storage, max_age_days, workers, rate_limit) -> None:
+    """Re-fetch outdated ratings and posters from OMDb with progress."""
+
+    def print_progress(done, total, result) -> None:
+        if done == total or done % max(total // 10, 1) == 0:
+            print(
+                f"{done}/{total} movies checked, "
+                + f"{result.throughput:.1f} requests/s"
+            )
+
+    result = refresh_movies(
+        storage, max_age_days, workers, rate_limit, print_progress
+    )
+    helper.print_color(
+        f"{result.checked} movies checked, {result.changed} changed, "
+        + f"{result.failed} failed in {result.seconds:.1f}s "
+        + f"({result.throughput:.1f} requests/s).",
+        "green" if not result.failed else "red",
+    )
+
+
+def print_filtered(storage, expression) -> None:
+    """Print the movies matching a filter expression at once."""
+    try:
+        query = compile_query(expression)
+    except FilterSyntaxError as error:
+        helper.print_color(f"{error}", "red")
+        return
+    movies = query.run(storage.get_movie_data())
+    if movies:
+        pager.write(pager.render_lines(movies))
 
 
 def get_file_path(storage_path, name, extension):
@@ -19,6 +19,8 @@ MENU_ITEMS = [
     "Movies sorted by year",
     "Filter movies",
     "Generate website",
+    "Full-text search",
+    "Movies like this",
 ]
 
 
@@ -47,16 +49,19 @@ class Menu:
         Returns:
             int: The selected menu number.
         """
+        last_choice = len(self.menu_items) - 1
         while True:
             try:
                 while True:
-                    choice = int(input("Enter choice (0-10): "))
-                    if choice > 10 or choice < 0:
+                    choice = int(input(f"Enter choice (0-{last_choice}): "))
+                    if choice > last_choice or choice < 0:
                         helper.print_color("Number out of range!", "red")
                     else:
                         break
             except ValueError:
-                helper.print_color("Only numbers 0-10 are allowed!", "red")
+                helper.print_color(
+                    f"Only numbers 0-{last_choice} are allowed!", "red"
+                )
             else:
                 return choice
 
@@ -0,0 +1,149 @@
+"""
+Streaming k-way merge of several movie databases.
+
+Every source database (JSON, CSV or binary, mixed) is streamed into sorted
+runs of at most `run_size` movies that are spilled to temporary files.
+The runs are merged with a heap in IMDb ID order, duplicates are resolved
+by a conflict policy and the result is written to the target database in
+a single pass. Memory use is bounded by the run size, not the library size,
+for JSON and CSV targets. Binary (.mvdb) targets are columnar and hold
+every column in memory while they are written.
+
+Usage:
+    Call `merge_databases(source_paths, target_path, policy)`.
+"""
+
+import heapq
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from itertools import groupby, islice
+from typing import Iterator
+
+from storage.istorage import RATING, UPDATED, movie_key
+from storage.storage_factory import get_storage
+
+POLICIES = ("newest", "rating")
+DEFAULT_RUN_SIZE = 50_000
+
+
+@dataclass
+class MergeResult:
+    read: int = 0
+    written: int = 0
+    duplicates: int = 0
+
+
+def _write_sorted_runs(
+    movies: Iterator[dict], priority: int, directory: str, run_size: int
+) -> list[str]:
+    """Split a movie stream into sorted runs saved as JSON lines files.
+
+    Returns:
+        list[str]: Paths of the run files.
+    """
+    run_paths = []
+    while True:
+        run = [
+            (movie_key(movie), priority, movie)
+            for movie in islice(movies, run_size)
+        ]
+        if not run:
+            return run_paths
+        run.sort(key=lambda entry: (entry[0], entry[1]))
+
+        file_descriptor, run_path = tempfile.mkstemp(
+            suffix=".jsonl", dir=directory
+        )
+        with os.fdopen(file_descriptor, "w") as file:
+            for entry in run:
+                file.write(json.dumps(entry) + "\n")
+        run_paths.append(run_path)
+
+
+def _read_run(run_path: str) -> Iterator[tuple]:
+    with open(run_path, "r") as file:
+        for line in file:
+            yield tuple(json.loads(line))
+
+
+def _choose(duplicates: list[tuple], policy: str) -> dict:
+    """Pick the movie that wins a conflict.
+
+    newest -- the most recently fetched movie, ties are won by the
+    most recently modified source
+    rating -- the movie with the highest rating
+    """
+    if policy == "rating":
+        return max(duplicates, key=lambda entry: entry[2][RATING])[2]
+    return max(
+        duplicates, key=lambda entry: (entry[2][UPDATED], entry[1])
+    )[2]
+
+
+def _merge_runs(
+    run_paths: list[str], policy: str, result: MergeResult
+) -> Iterator[dict]:
+    runs = [_read_run(run_path) for run_path in run_paths]
+    merged = heapq.merge(*runs, key=lambda entry: entry[0])
+    for _, group in groupby(merged, key=lambda entry: entry[0]):
+        duplicates = list(group)
+        result.read += len(duplicates)
+        result.duplicates += len(duplicates) - 1
+        result.written += 1
+        yield _choose(duplicates, policy)
+
+
+def merge_databases(
+    source_paths: list[str],
+    target_path: str,
+    policy: str = "newest",
+    run_size: int = DEFAULT_RUN_SIZE,
+) -> MergeResult:
+    """Merge all source databases into `target_path`, sorted by IMDb ID.
+    The target may be one of the sources: the merge is saved to a temporary
+    file that replaces the target only once it is complete, so a failed
+    write leaves every source intact.
+
+    Arguments:
+        source_paths -- database files, the format is chosen by extension
+        target_path -- database file to write
+
+    Keyword Arguments:
+        policy -- 'newest' or 'rating' (default: {"newest"})
+        run_size -- movies held in memory per sorted run (default: {50000})
+
+    Raises:
+        FileNotFoundError: If a source database does not exist.
+        ValueError: If the policy is unknown.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Conflict policy must be one of {POLICIES}!")
+    for source_path in source_paths:
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(
+                f"Database '{source_path}' does not exist!"
+            )
+
+    # the priority of a source is its modification time rank,
+    # later arguments win ties
+    by_age = sorted(
+        range(len(source_paths)),
+        key=lambda index: (os.path.getmtime(source_paths[index]), index),
+    )
+    priorities = {index: rank for rank, index in enumerate(by_age)}
+
+    result = MergeResult()
+    with tempfile.TemporaryDirectory() as directory:
+        run_paths = []
+        for index, source_path in enumerate(source_paths):
+            movies = get_storage(source_path).iter_movie_data()
+            run_paths += _write_sorted_runs(
+                movies, priorities[index], directory, run_size
+            )
+
+        target = get_storage(target_path)
+        target._save_movies(_merge_runs(run_paths, policy, result))
+
+    return result
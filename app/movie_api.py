@@ -1,23 +1,31 @@
 """
 Module for fetching movie data from the OMDB API.
 
-This module loads the API key from environment variables and provides a function
+This module loads the API key from environment variables and provides functions
 to request movie information with retry logic for handling HTTP errors.
+Requests go through one shared `SyncOmdbClient`, identical lookups running
+at the same time are sent once and all lookups share one rate limit, the
+batched lookups of the ratings refresh included.
 
 Usage:
-    Call `request_for_movie(title: str)` with a movie title.
+    Call `request_for_movie(title: str)` with a movie title or
+    `request_for_movie_by_id(imdb_id: str)` with an IMDb ID.
+    Batches run as coroutines with `run_on_shared_client(function)`.
 """
 
 import os
+import threading
 
-import requests
 from dotenv import load_dotenv
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from omdb_client import SyncOmdbClient
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
+_client = None
+_client_lock = threading.Lock()
+
 
 def request_for_movie(title: str) -> dict:
     """
@@ -34,33 +42,46 @@ def request_for_movie(title: str) -> dict:
         HTTPError: If an HTTP error occurs and retries are exhausted.
         Timeout: If the request times out and retries are exhausted.
     """
+    return _shared_client().movie(title)
+
+
+def request_for_movie_by_id(imdb_id: str) -> dict:
+    """
+    Send a GET request with an IMDb ID to www.omdbapi.com with authorization
+    and retry logic.
+
+    Args:
+        imdb_id (str): The IMDb ID of the movie, like 'tt0133093'.
+
+    Returns:
+        dict: The JSON response from the server.
+
+    Raises:
+        HTTPError: If an HTTP error occurs and retries are exhausted.
+        Timeout: If the request times out and retries are exhausted.
+    """
+    return _shared_client().movie_by_id(imdb_id)
+
+
+def run_on_shared_client(function, **options):
+    """
+    Run the coroutine `function(client)` with the shared `OmdbClient` on its
+    event loop and return its result. Its lookups share the rate limit and
+    the in-flight requests with all other callers.
+
+    Args:
+        function: Async function taking an `OmdbClient`.
+        **options: `OmdbClient` options like `rate` and `concurrency`,
+            used only if the shared client does not exist yet.
+    """
+    return _shared_client(**options).run(function)
+
 
-    url = "http://www.omdbapi.com/?"
-    headers = {"Content-Type": "application/json"}
-    params = {"apikey": API_KEY, "t": title}
-    timeout = 5
-
-    # Configure retries with exponential backoff
-    retries = Retry(
-        total=3,  # Total number of retries
-        backoff_factor=1,  # Wait time between retries: 1 second, 2 seconds, 4 seconds
-        status_forcelist=[
-            429,
-            500,
-            502,
-            503,
-            504,
-        ],  # Retry on specific status codes
-    )
-
-    # Set up the HTTPAdapter with retry configuration
-    adapter = HTTPAdapter(max_retries=retries)
-
-    # Use requests.Session() to apply retries
-    with requests.Session() as session:
-        session.mount("https://", adapter)
-        response = session.get(
-            url, headers=headers, params=params, timeout=timeout
-        )
-        response.raise_for_status()  # Raise an error for bad HTTP responses
-        return response.json()
+def _shared_client(**options) -> SyncOmdbClient:
+    """Return the client shared by all callers, so identical lookups
+    of different threads are sent only once."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SyncOmdbClient(API_KEY, **options)
+        return _client
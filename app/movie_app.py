@@ -8,14 +8,20 @@ viewing statistics, random movie suggestions, and generating an HTML website.
 import datetime
 import os
 import random
-import re
 import statistics
 
+import pager
 import utility as helper
-from storage.istorage import RATING, TITLE, YEAR
+from fulltext_index import FullTextIndex, QuerySyntaxError
+from storage.istorage import ID, RATING, TITLE, YEAR, get_details
 from menu import Menu
 from movie_api import request_for_movie
+from movie_filter import FilterQuery, FilterSyntaxError, compile_query
+from query_api import MovieSnapshot
+from recommend import MovieRecommender
 from thefuzz import process
+from title_index import TitleIndex
+from website import WebsiteGenerator
 
 
 class MovieApp:
@@ -23,7 +29,10 @@ class MovieApp:
 
     def __init__(self, storage) -> None:
         self.storage = storage
+        self.movies_modified = self.storage.last_modified()
         self.movies = self.storage.get_movie_data()
+        self.title_index = TitleIndex(self.movies)
+        self.title_index_modified = self.movies_modified
         self.menu_actions = Menu({
             "Exit": self._print_bye,
             "List movies": self._print_movie_list,
@@ -36,10 +45,34 @@ class MovieApp:
             "Movies sorted by year": self._print_sorted_movies_by_year,
             "Filter movies": self._prompt_user_to_filter_movies,
             "Generate website": self._generate_website,
+            "Full-text search": self._prompt_user_for_fulltext_search,
+            "Movies like this": self._prompt_user_for_similar_movies,
         })
+        # loaded on first use, building it reads the whole library
+        self.fulltext_index = None
+        self.recommender = None
+        self.snapshot = None
 
     def _update_movies(self) -> None:
-        self.movies = self.storage.get_movie_data()
+        """Reload the movies only if the database was saved since."""
+        last_modified = self.storage.last_modified()
+        if last_modified != self.movies_modified:
+            self.movies = self.storage.get_movie_data()
+            self.movies_modified = last_modified
+        self._sync_title_index(last_modified)
+
+    def _update_title_index(self) -> None:
+        """Make the title index current, reading the library only if it was
+        changed outside of the app. Own changes keep the index current."""
+        if self.storage.last_modified() != self.title_index_modified:
+            self._update_movies()
+
+    def _sync_title_index(self, last_modified: float) -> None:
+        """Rebuild the title index only if the database was changed outside
+        of the app. Own changes update the index incrementally."""
+        if last_modified != self.title_index_modified:
+            self.title_index = TitleIndex(self.movies)
+            self.title_index_modified = last_modified
 
     # 0 Exit
     def _print_bye(self) -> None:
@@ -51,14 +84,21 @@ class MovieApp:
 
     # 1 List movies
     def _print_movie_list(self) -> None:
-        """Print all movies in database."""
-        self._update_movies()
+        """Print all movies in database. Libraries larger than the terminal
+        are shown page by page in alphabetical order."""
+        snapshot = self._get_snapshot()
         print("")
-        print(len(self.movies), "movies in total")
-        for movie in self.movies:
-            print(f"{movie[TITLE]} ({movie[YEAR]}): {movie[RATING]}")
-
-        helper.enter_to_continue()
+        print(len(snapshot.movies), "movies in total")
+        if len(snapshot.movies) <= pager.page_size():
+            pager.write(pager.render_lines(snapshot.movies))
+            helper.enter_to_continue()
+        else:
+            # the snapshot keeps the title order, only pages are rendered
+            pager.MoviePager(
+                snapshot.sorted_by[TITLE],
+                TITLE,
+                keys=snapshot.sort_keys[TITLE],
+            ).run()
 
     # 2 Add movie
     def _prompt_user_to_add_movie(self) -> None:
@@ -79,9 +119,21 @@ class MovieApp:
                 rating = movie["imdbRating"]
                 poster_url = movie["Poster"]
                 imdb_id = movie["imdbID"]
+                details = get_details(movie)
                 self.storage._add_movie(
-                    title, year, rating, poster_url, imdb_id
+                    title, year, rating, poster_url, imdb_id, details
                 )
+                self.title_index.add(title, float(rating))
+                self.title_index_modified = self.storage.last_modified()
+                if self.fulltext_index is not None:
+                    self.fulltext_index.add({
+                        TITLE: title,
+                        YEAR: int(year),
+                        RATING: float(rating),
+                        ID: imdb_id,
+                        **details,
+                    })
+                    self.fulltext_index.save(self.title_index_modified)
                 helper.print_color(
                     f"Movie '{title}' successfully added!", "green"
                 )
@@ -103,6 +155,11 @@ class MovieApp:
 
         if movie_title:
             self.storage._delete_movie(movie_title)
+            self.title_index.remove(movie_title)
+            self.title_index_modified = self.storage.last_modified()
+            if self.fulltext_index is not None:
+                self.fulltext_index.remove_title(movie_title)
+                self.fulltext_index.save(self.title_index_modified)
             helper.print_color(
                 f"Movie '{movie_title}' successfully deleted!", "green"
             )
@@ -157,8 +214,11 @@ class MovieApp:
             valid movie title, except you cancel because movie exists
             or does not exist, depending on reverse boolean.
         """
+        self._update_title_index()
         while True:
-            movie_title = input("Enter a movie name: ")
+            movie_title = helper.input_with_completion(
+                "Enter a movie name: ", self.title_index.suggest
+            )
             if len(movie_title) == 0:
                 helper.print_color("You must type in a movie!", "red")
                 continue
@@ -247,13 +307,11 @@ class MovieApp:
         Returns:
             bool: True or False
         """
-        self._update_movies()
+        self._update_title_index()
         if not case_sensitive:
-            movies_lower = map(lambda x: x[TITLE].lower(), self.movies)
-            return movie_title.lower() in movies_lower
+            return self.title_index.find(movie_title) is not None
         else:
-            movies_og = map(lambda x: x[TITLE], self.movies)
-            return movie_title in movies_og
+            return movie_title in self.title_index
 
     def _ask_user_for_another_movie(self) -> bool:
         """Ask user if he wants to proceed and enter another movie title
@@ -337,7 +395,9 @@ class MovieApp:
         that film in the database and return an exact result or suggestions
         if not found exact movie"""
         self._update_movies()
-        search_term = input("Enter full or part of  a movie title: ")
+        search_term = helper.input_with_completion(
+            "Enter full or part of  a movie title: ", self.title_index.suggest
+        )
         if search_term:
             self._fuzzy_search(self.movies, search_term)
         else:
@@ -406,33 +466,26 @@ class MovieApp:
 
     # 9 Filter movies
     def _prompt_user_to_filter_movies(self) -> None:
-        """Print sorted movies based on user choice. You can sort according:
-        'Title', 'Year' or 'Rating'
-        Additionally you can define the sorting order:
-        Descending is default. Add 'asc' to filter item for ascending order."""
-        filter_item = input(
-            "Filter by ('title', 'year' or 'rating') "
-            + "for ascending order type for example: 'year asc':\n"
-        )
-        filter_item = filter_item.strip().lower()
-
-        if len(filter_item.split()) == 2:
-            filter_item, order = filter_item.split()
-            if filter_item not in ("title", "year", "rating"):
-                helper.print_color("Wrong filter name!", "red")
-                return self._prompt_user_to_filter_movies()
-            if order != "asc":
-                helper.print_color("Wrong order argument!", "red")
-                return self._prompt_user_to_filter_movies()
-            return self._print_filtered_movies_by(filter_item, order)
-        elif len(filter_item.split()) == 1:
-            if filter_item not in ("title", "year", "rating"):
-                helper.print_color("Wrong filter name!", "red")
-                return self._prompt_user_to_filter_movies()
-            return self._print_filtered_movies_by(filter_item)
-        else:
-            helper.print_color("Wrong input!", "red")
-            return self._prompt_user_to_filter_movies()
+        """Print movies matching a filter expression, for example
+        'year>=1990 and rating>7.5 and title~"star" order by rating desc'.
+        The old input of a field with an optional order like 'year asc'
+        still works. Asks again until the expression is valid,
+        an empty input goes back to the menu."""
+        print("")
+        print("Filter by title, year, rating, genre, director, actors,")
+        print("plot, runtime or id, like 'year>=1990 and genre~drama',")
+        print("add 'order by rating desc, year' and 'limit 20' if you like.")
+        print("A field alone sorts by it, 'year asc' sorts ascending.")
+        while True:
+            expression = input("Filter: ").strip()
+            if not expression:
+                return
+            try:
+                query = compile_query(expression)
+            except FilterSyntaxError as error:
+                helper.print_color(f"{error}", "red")
+            else:
+                return self._print_query_result(query)
 
     def _print_filtered_movies_by(
         self, filter_item: str, order: str = "desc"
@@ -448,102 +501,113 @@ class MovieApp:
             like 'title asc'
             (default: {"desc"})
         """
-        sorted_movies = self._sort_movies_by(
-            filter_item.capitalize(), order.lower()
-        )
+        query = compile_query(f"{filter_item} {order}")
+        return self._print_query_result(query)
+
+    def _print_query_result(self, query: FilterQuery) -> None:
+        """Run a compiled filter on the sorted snapshot and page the result."""
+        snapshot = self._get_snapshot()
+        movies = query.run(snapshot.movies, snapshot)
+        field, descending = query.order[0]
         print("")
-        for movie in sorted_movies:
-            print(f"{movie[TITLE]} ({movie[YEAR]}) {movie[RATING]}")
-        helper.enter_to_continue()
-
-    def _sort_movies_by(self, filter_item: str, order: str = "desc") -> list:
-        """Sorts a copied movie list with chosen filter specs
-
-        Arguments:
-            filter_item -- can be 'title', 'year' or 'rating'
-
-        Keyword Arguments:
-            order -- optionally you can add asc to the filter item
-            like 'title asc'(default: {"desc"})
-
-        Returns:
-            _description_
-        """
-        self._update_movies()
-        sorted_movies = sorted(self.movies, key=lambda item: item[filter_item])
-        if order == "desc":
-            sorted_movies = reversed(sorted_movies)
-
-        return list(sorted_movies)
+        if not movies:
+            helper.print_color(f"No movies match '{query.expression}'", "red")
+            return helper.enter_to_continue()
+        print(len(movies), "movies found")
+        pager.show_movies(movies, field, descending)
+
+    def _get_snapshot(self) -> MovieSnapshot:
+        """Return movies with sort orders for filtering, built again
+        only if the library changed since."""
+        last_modified = self.storage.last_modified()
+        if (
+            self.snapshot is None
+            or self.snapshot.last_modified != last_modified
+        ):
+            self._update_movies()
+            self.snapshot = MovieSnapshot(self.movies, last_modified)
+        return self.snapshot
 
     # 10 Generate Website
     def _generate_website(self) -> None:
         """Generates a website with a custom heading and movie grid.
         Creates `static/index.html` using a template and user-provided title.
         """
-        template_file = "static/templates/index_template.html"
-        website = "static/index.html"
         website_title = input("Type a website heading: ")
-        with open(template_file, "r") as file:
-            data = file.read()
-
-        movie_html = self._generate_movie_html()
-        template_html = data
-
-        translation_table = {
-            "__TEMPLATE_TITLE__": website_title,
-            "__TEMPLATE_MOVIE_GRID__": movie_html,
-        }
-        website_html = re.sub(
-            "|".join([word for word in translation_table]),
-            lambda x: translation_table[x.group()],
-            template_html,
-        )
+        self._update_movies()
 
         # save new generated index.html
-        with open(website, "w") as file:
-            file.write(website_html)
+        WebsiteGenerator().write_index(website_title, self.movies)
         helper.print_color("Website was generated successfully.", "green")
         helper.enter_to_continue()
 
-    def _generate_movie_html(self) -> str:
-        """
-        Generates HTML for all movies.
+    # 11 Full-text search
+    def _prompt_user_for_fulltext_search(self) -> None:
+        """Prompt for a full-text query over title, genre, director, actors
+        and plot, like 'genre:drama director:nolan', and print the best
+        matching movies."""
+        print("")
+        print("Search words, limit words to a field with genre:, director:,")
+        print("actors:, title: or plot:, combine with OR, exclude with -word")
+        query = input("Enter query: ")
 
-        Returns:
-            str: Combined HTML of all movies.
-        """
-        self._update_movies()
-        html_template = self.get_movie_html_template()
-        final_html = ""
-
-        for movie in self.movies:
-            translation_table = {
-                "__POSTER__": movie["Poster"],
-                "__TITLE__": movie["Title"],
-                "__YEAR__": str(movie["Year"]),
-                "__STARS__": round(int(movie["Rating"] // 2)) * "⭐",
-                "__LINK__": movie["ID"],
-            }
-
-            movie_html = re.sub(
-                "|".join([word for word in translation_table]),
-                lambda x: translation_table[x.group()],
-                html_template,
-            )
-            final_html += movie_html
-        return final_html
+        index = self._get_fulltext_index()
+        try:
+            results = index.search(query)
+        except QuerySyntaxError as error:
+            helper.print_color(f"{error}", "red")
+        else:
+            if results:
+                for result in results:
+                    print(
+                        f"{result['title']} ({result['year']}) "
+                        + f"{result['rating']}"
+                    )
+            else:
+                helper.print_color(f"Nothing with '{query}' found", "red")
+        helper.enter_to_continue()
 
-    def get_movie_html_template(self) -> str:
-        """
-        Loads the HTML template for a single movie.
+    def _get_fulltext_index(self) -> FullTextIndex:
+        """Return the full-text index, reloading it if the database
+        was changed outside of the app."""
+        last_modified = self.storage.last_modified()
+        if (
+            self.fulltext_index is None
+            or self.fulltext_index.last_modified != last_modified
+        ):
+            self.fulltext_index = FullTextIndex.for_storage(self.storage)
+        return self.fulltext_index
+
+    # 12 Movies like this
+    def _prompt_user_for_similar_movies(self) -> None:
+        """Prompt for a movie and print the movies most similar to it
+        in year, rating, genre and title."""
+        movie_title = self._get_valid_movie_title_from_user(
+            case_sensitive=False, reverse=True
+        )
+        if movie_title is None:
+            return
 
-        Returns:
-            str: The HTML template content.
-        """
-        movie_html_template = "static/templates/movie_template.html"
-        with open(movie_html_template, "r") as file:
-            return file.read()
+        recommender = self._get_recommender()
+        print("")
+        for movie, similarity in recommender.similar(movie_title):
+            print(
+                f"{movie[TITLE]} ({movie[YEAR]}) {movie[RATING]}"
+                + f" - {similarity:.0%} similar"
+            )
+        helper.enter_to_continue()
+
+    def _get_recommender(self) -> MovieRecommender:
+        """Return the recommender, rebuilding its feature matrix only
+        if the library changed since it was built."""
+        last_modified = self.storage.last_modified()
+        if (
+            self.recommender is None
+            or self.recommender.last_modified != last_modified
+        ):
+            self._update_movies()
+            self.recommender = MovieRecommender(self.movies, last_modified)
+        return self.recommender
 
     def run(self) -> None:
         """
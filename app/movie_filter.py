@@ -0,0 +1,484 @@
+"""
+Filter and sort expressions for movie listings.
+
+An expression is parsed once and compiled into a predicate and sort keys:
+
+    year>=1990 and rating>7.5 and title~"star" order by rating desc, year
+    limit 50
+
+Conditions compare a field with a value, `~` means "contains" and text is
+compared ignoring case. Conditions are combined with `and`, `or`, `not` and
+parentheses. Without `order by` movies are sorted by title. The short form
+of the old filter menu, a field with an optional order like 'year asc',
+sorts by that field, descending by default.
+
+Fields: title, year, rating, genre, director, actors, plot, runtime, id
+
+Queries run with a single scan over a movie list. Given an index with
+sorted movie lists, like the `MovieSnapshot` of the query API, year and
+rating ranges are cut out by binary search and ordered queries with a limit
+stop scanning as soon as enough movies matched.
+
+Usage:
+    query = compile_query("genre~drama and year<2000 order by rating desc")
+    query.run(movies)
+"""
+
+import heapq
+import operator
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import islice
+
+from storage.istorage import (
+    ACTORS,
+    DIRECTOR,
+    GENRE,
+    ID,
+    PLOT,
+    RATING,
+    RUNTIME,
+    TITLE,
+    YEAR,
+)
+
+FIELDS = {
+    "title": TITLE,
+    "year": YEAR,
+    "rating": RATING,
+    "genre": GENRE,
+    "director": DIRECTOR,
+    "actors": ACTORS,
+    "plot": PLOT,
+    "runtime": RUNTIME,
+    "id": ID,
+}
+NUMERIC_FIELDS = {YEAR: int, RATING: float}
+OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "~": operator.contains,
+}
+DEFAULT_ORDER = [(TITLE, False)]
+# largest share of the library an index range may cover to be used
+MAX_RANGE_SHARE = 0.1
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        | (?P<symbol>[<>!=]=|[<>=~(),])
+        | (?P<word>[^\s"'<>=!~(),]+)
+    )""",
+    re.VERBOSE,
+)
+
+
+class FilterSyntaxError(ValueError):
+    """Raised for expressions that cannot be parsed."""
+
+
+def tokenize(expression: str) -> list[tuple[str, str]]:
+    """Split an expression into (kind, text) tokens,
+    kind is 'string', 'symbol' or 'word'.
+
+    Raises:
+        FilterSyntaxError: For characters that start no token.
+    """
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if match is None:
+            raise FilterSyntaxError(
+                f"Unexpected '{expression[position:].strip()[:10]}'!"
+            )
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "string":
+            text = re.sub(r"\\(.)", r"\1", text[1:-1])
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+def _text_of(field: str):
+    return lambda movie: str(movie.get(field) or "").casefold()
+
+
+def sort_key(field: str):
+    """Return the key function sorting movies by `field`,
+    text ignoring case."""
+    if field in NUMERIC_FIELDS:
+        return operator.itemgetter(field)
+    return _text_of(field)
+
+
+def _both(left, right):
+    return lambda movie: left(movie) and right(movie)
+
+
+def _either(left, right):
+    return lambda movie: left(movie) or right(movie)
+
+
+def _negate(predicate):
+    return lambda movie: not predicate(movie)
+
+
+def _compare(field: str, symbol: str, value: str):
+    """Compile one condition like year >= 1990 into a predicate."""
+    function = OPERATORS[symbol]
+    if field in NUMERIC_FIELDS:
+        if symbol == "~":
+            raise FilterSyntaxError("'~' only works with text fields!")
+        try:
+            number = NUMERIC_FIELDS[field](value)
+        except ValueError:
+            raise FilterSyntaxError(
+                f"{field} needs a number, not '{value}'!"
+            )
+        return lambda movie: function(movie[field], number)
+
+    text_of = _text_of(field)
+    value = value.casefold()
+    return lambda movie: function(text_of(movie), value)
+
+
+class _Parser:
+    """Recursive descent parser producing a `FilterQuery`.
+
+    Conditions are kept as nested tuples ('and', [...]), ('or', [...]),
+    ('not', condition) and ('compare', field, symbol, value) until the
+    whole expression was read.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def _peek(self) -> tuple[str, str] | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self, description: str) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise FilterSyntaxError(f"Expected {description} at the end!")
+        self.position += 1
+        return token
+
+    def _keyword(self, *words: str) -> str | None:
+        """Consume and return the next word if it is one of `words`."""
+        token = self._peek()
+        if token and token[0] == "word" and token[1].lower() in words:
+            self.position += 1
+            return token[1].lower()
+        return None
+
+    def _field(self) -> str:
+        kind, text = self._next("a field")
+        if kind != "word" or text.lower() not in FIELDS:
+            raise FilterSyntaxError(
+                f"Unknown field '{text}', use one of: {', '.join(FIELDS)}"
+            )
+        return FIELDS[text.lower()]
+
+    def parse(self) -> "FilterQuery":
+        legacy = self._parse_legacy()
+        if legacy is not None:
+            return legacy
+
+        condition = None
+        token = self._peek()
+        if token and not (
+            token[0] == "word" and token[1].lower() in ("order", "limit")
+        ):
+            condition = self._parse_or()
+
+        order = []
+        if self._keyword("order"):
+            if not self._keyword("by"):
+                raise FilterSyntaxError("Expected 'by' after 'order'!")
+            order.append(self._parse_sort_item())
+            while self._peek() == ("symbol", ","):
+                self.position += 1
+                order.append(self._parse_sort_item())
+
+        limit = None
+        if self._keyword("limit"):
+            _, text = self._next("a number after 'limit'")
+            if not text.isdecimal() or int(text) == 0:
+                raise FilterSyntaxError("Limit must be a positive number!")
+            limit = int(text)
+
+        token = self._peek()
+        if token is not None:
+            raise FilterSyntaxError(f"Unexpected '{token[1]}'!")
+        return FilterQuery(self.expression, condition, order, limit)
+
+    def _parse_legacy(self) -> "FilterQuery | None":
+        """Parse the old menu input 'field' or 'field asc'."""
+        words = [text.lower() for kind, text in self.tokens if kind == "word"]
+        if (
+            len(words) != len(self.tokens)
+            or not 1 <= len(words) <= 2
+            or words[0] not in FIELDS
+            or words[1:] not in ([], ["asc"], ["desc"])
+        ):
+            return None
+        descending = words[1:] != ["asc"]
+        return FilterQuery(
+            self.expression, None, [(FIELDS[words[0]], descending)], None
+        )
+
+    def _parse_sort_item(self) -> tuple[str, bool]:
+        field = self._field()
+        return field, self._keyword("asc", "desc") == "desc"
+
+    def _parse_or(self):
+        conditions = [self._parse_and()]
+        while self._keyword("or"):
+            conditions.append(self._parse_and())
+        return conditions[0] if len(conditions) == 1 else ("or", conditions)
+
+    def _parse_and(self):
+        conditions = [self._parse_not()]
+        while self._keyword("and"):
+            conditions.append(self._parse_not())
+        return conditions[0] if len(conditions) == 1 else ("and", conditions)
+
+    def _parse_not(self):
+        if self._keyword("not"):
+            return ("not", self._parse_not())
+        if self._peek() == ("symbol", "("):
+            self.position += 1
+            condition = self._parse_or()
+            if self._next("')'") != ("symbol", ")"):
+                raise FilterSyntaxError("Expected ')'!")
+            return condition
+        return self._parse_compare()
+
+    def _parse_compare(self):
+        field = self._field()
+        kind, symbol = self._next("a comparison like '>=' or '~'")
+        if kind != "symbol" or symbol not in OPERATORS:
+            raise FilterSyntaxError(
+                f"Expected a comparison after the field, not '{symbol}'!"
+            )
+        kind, value = self._next("a value")
+        if kind == "symbol":
+            raise FilterSyntaxError(f"Expected a value, not '{value}'!")
+        # fail on bad values while parsing, not on the first movie
+        _compare(field, symbol, value)
+        return ("compare", field, symbol, value)
+
+
+def _compile(condition):
+    """Turn a parsed condition into a predicate function."""
+    kind = condition[0]
+    if kind == "compare":
+        return _compare(*condition[1:])
+    if kind == "not":
+        return _negate(_compile(condition[1]))
+    predicates = [_compile(part) for part in condition[1]]
+    combine = _both if kind == "and" else _either
+    predicate = predicates[0]
+    for other in predicates[1:]:
+        predicate = combine(predicate, other)
+    return predicate
+
+
+def _ranges(condition) -> dict[str, list]:
+    """Collect the bounds every match must be within from numeric
+    comparisons that are joined by 'and' on the top level.
+
+    Returns:
+        movie key -> [low, low inclusive, high, high inclusive]
+    """
+    if condition is None:
+        return {}
+    parts = condition[1] if condition[0] == "and" else [condition]
+    ranges = {}
+    for part in parts:
+        if part[0] != "compare" or part[1] not in NUMERIC_FIELDS:
+            continue
+        _, field, symbol, value = part
+        value = NUMERIC_FIELDS[field](value)
+        bounds = ranges.setdefault(field, [None, True, None, True])
+        if symbol in (">", ">=", "=", "=="):
+            if bounds[0] is None or value >= bounds[0]:
+                inclusive = symbol != ">"
+                if value == bounds[0]:
+                    inclusive = inclusive and bounds[1]
+                bounds[0:2] = [value, inclusive]
+        if symbol in ("<", "<=", "=", "=="):
+            if bounds[2] is None or value <= bounds[2]:
+                inclusive = symbol != "<"
+                if value == bounds[2]:
+                    inclusive = inclusive and bounds[3]
+                bounds[2:4] = [value, inclusive]
+    return ranges
+
+
+def _descending(ordered: list, key):
+    """Iterate movies sorted ascending by `key` from the highest key down.
+    Ties keep their order, like a stable sort with reverse=True."""
+    ties = []
+    for movie in reversed(ordered):
+        if ties and key(movie) != key(ties[-1]):
+            yield from reversed(ties)
+            ties = []
+        ties.append(movie)
+    yield from reversed(ties)
+
+
+def _slice(keys: list, bounds: list) -> tuple[int, int]:
+    """Return the slice of sorted `keys` within `bounds`."""
+    low, low_inclusive, high, high_inclusive = bounds
+    start = 0
+    if low is not None:
+        start = (bisect_left if low_inclusive else bisect_right)(keys, low)
+    end = len(keys)
+    if high is not None:
+        end = (bisect_right if high_inclusive else bisect_left)(keys, high)
+    return start, max(start, end)
+
+
+class FilterQuery:
+    """A compiled filter expression.
+
+    Attributes:
+        expression (str): The source text.
+        predicate (callable | None): True for matching movies,
+        None matches all movies.
+        order (list): (movie key, descending) pairs, the first sorts first.
+        keys (list): Sort key functions in the same order.
+        limit (int | None): Maximum number of movies returned.
+        ranges (dict): Numeric bounds all matches are within,
+        used to search sorted indexes.
+    """
+
+    def __init__(self, expression, condition, order, limit) -> None:
+        self.expression = expression
+        self.predicate = None if condition is None else _compile(condition)
+        self.order = order or DEFAULT_ORDER
+        self.keys = [sort_key(field) for field, _ in self.order]
+        self.limit = limit
+        self.ranges = _ranges(condition)
+
+    def sort(self, movies: list[dict]) -> None:
+        """Sort movies in place, one stable pass per sort field."""
+        passes = list(zip(self.keys, self.order))
+        for key, (_, descending) in reversed(passes):
+            movies.sort(key=key, reverse=descending)
+
+    def run(self, movies, index=None) -> list[dict]:
+        """Return the matching movies in order.
+
+        Arguments:
+            movies -- all movies
+
+        Keyword Arguments:
+            index -- optional sorted view of the same movies with
+            `sorted_by`, `sort_keys` and `positions` dictionaries, like a
+            `MovieSnapshot`
+        """
+        candidates, sorted_field = movies, None
+        if index is not None:
+            candidates, sorted_field = self._from_index(movies, index)
+
+        field, descending = self.order[0]
+        if sorted_field == field and (
+            self.limit is not None or self.order == [(field, False)]
+        ):
+            return self._take_in_order(candidates, descending)
+
+        if self.predicate is None:
+            matches = list(candidates)
+        else:
+            matches = list(filter(self.predicate, candidates))
+        if self.limit is not None and len(self.order) == 1:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(self.limit, matches, key=self.keys[0])
+        # presorted candidates make this sort close to linear
+        self.sort(matches)
+        return matches[: self.limit]
+
+    def _from_index(self, movies, index) -> tuple[list, str | None]:
+        """Return the candidates and the field they are sorted by.
+
+        Sorted lists only pay off where they skip most movies: a narrow
+        range of an indexed field, or walking the first sort field until
+        the limit is reached. Otherwise all movies are scanned, in their
+        original order they are faster to filter and sort.
+        """
+        best = None
+        for field, bounds in self.ranges.items():
+            if field in index.sort_keys:
+                start, end = _slice(index.sort_keys[field], bounds)
+                if best is None or end - start < best[2] - best[1]:
+                    best = (field, start, end)
+        if best is not None:
+            field, start, end = best
+            if end - start <= len(movies) * MAX_RANGE_SHARE:
+                candidates = index.sorted_by[field][start:end]
+                if field == self.order[0][0]:
+                    return candidates, field
+                # ties are ordered like in a scan, by storage order
+                positions = index.positions
+                candidates.sort(key=lambda movie: positions[id(movie)])
+                return candidates, None
+
+        field = self.order[0][0]
+        if (
+            field in index.sorted_by
+            and (self.limit is not None or self.order == [(field, False)])
+        ):
+            return index.sorted_by[field], field
+        return movies, None
+
+    def _take_in_order(self, ordered, descending: bool) -> list[dict]:
+        """Return matches of `ordered`, which is sorted by the first sort
+        field, scanning only until the limit is reached."""
+        if descending:
+            movies = _descending(ordered, self.keys[0])
+        else:
+            movies = iter(ordered)
+        if self.predicate is not None:
+            movies = filter(self.predicate, movies)
+        if self.limit is None:
+            return list(movies)
+        if len(self.order) == 1:
+            return list(islice(movies, self.limit))
+
+        # the other fields order ties, so whole groups of ties are taken
+        first_key = self.keys[0]
+        taken = []
+        for movie in movies:
+            if len(taken) >= self.limit:
+                if first_key(movie) != first_key(taken[-1]):
+                    break
+            taken.append(movie)
+        self.sort(taken)
+        return taken[: self.limit]
+
+
+@lru_cache(maxsize=128)
+def compile_query(expression: str) -> FilterQuery:
+    """Parse and compile a filter expression, repeated expressions
+    are compiled only once.
+
+    Raises:
+        FilterSyntaxError: If the expression cannot be parsed.
+    """
+    if not expression.strip():
+        raise FilterSyntaxError("Expression must not be empty!")
+    return _Parser(expression).parse()
@@ -0,0 +1,230 @@
+"""
+Asynchronous OMDb client with request coalescing and rate limiting.
+
+Identical lookups that are in flight at the same time share one HTTP
+request (single flight). All requests pass a token bucket that pauses
+when OMDb answers 429 Too Many Requests, and a semaphore bounds how many
+requests are open at once. HTTP calls are made with `requests` in worker
+threads, so the client needs no extra dependency.
+
+`SyncOmdbClient` runs an `OmdbClient` on an event loop in a daemon thread,
+so blocking code and several threads can share its coalescing and limits.
+
+Usage:
+    async with OmdbClient(rate=10, concurrency=8) as client:
+        movies = await asyncio.gather(*map(client.movie_by_id, ids))
+
+    SyncOmdbClient().movie("The Matrix")
+"""
+
+import asyncio
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+URL = "http://www.omdbapi.com/"
+TIMEOUT = 5
+RETRIES = 3
+# wait time between retries: 1 second, 2 seconds, 4 seconds
+BACKOFF_FACTOR = 1
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_RATE_LIMIT = 10.0
+DEFAULT_CONCURRENCY = 8
+
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts up to `capacity`.
+
+    Attributes:
+        tokens (float): Requests that may start right now.
+        paused_until (float): Monotonic time before which no request
+        starts, set by `pause` after a 429 response.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a token. Waiting callers are served in order."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` and drop the burst,
+        so requests resume slowly after the server asked to back off."""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+
+def _retry_after(response: requests.Response, default: float) -> float:
+    """Seconds from a Retry-After header, `default` if there is none."""
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return default
+
+
+class OmdbClient:
+    """Coalescing, rate limited OMDb client for one event loop.
+
+    Attributes:
+        in_flight (dict): Running request tasks by normalized query.
+        sent (int): HTTP requests sent, retries included.
+        coalesced (int): Lookups answered by a request already in flight.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        rate: float = DEFAULT_RATE_LIMIT,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retries: int = RETRIES,
+    ) -> None:
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.in_flight = {}
+        self.sent = 0
+        self.coalesced = 0
+        # one keep-alive connection per concurrent request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    async def __aenter__(self) -> "OmdbClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    async def movie(self, title: str) -> dict:
+        """Return the OMDb response for a movie title.
+
+        Raises:
+            HTTPError: If an HTTP error occurs and retries are exhausted.
+            Timeout: If the request times out and retries are exhausted.
+        """
+        return await self.get({"t": title})
+
+    async def movie_by_id(self, imdb_id: str) -> dict:
+        """Return the OMDb response for an IMDb ID like 'tt0133093'.
+
+        Raises:
+            HTTPError: If an HTTP error occurs and retries are exhausted.
+            Timeout: If the request times out and retries are exhausted.
+        """
+        return await self.get({"i": imdb_id})
+
+    async def get(self, query: dict) -> dict:
+        """Return the response for `query`, joining an identical request
+        that is already running instead of sending another one."""
+        # OMDb ignores case and surrounding spaces of titles and IDs
+        key = tuple(sorted(
+            (name, str(value).strip().casefold())
+            for name, value in query.items()
+        ))
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(query))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, query: dict) -> dict:
+        params = {"apikey": self.api_key, **query}
+        for attempt in range(self.retries + 1):
+            backoff = BACKOFF_FACTOR * 2**attempt
+            last_attempt = attempt == self.retries
+            await self.bucket.acquire()
+            async with self.semaphore:
+                self.sent += 1
+                try:
+                    response = await asyncio.to_thread(
+                        self.session.get, URL, params=params, timeout=TIMEOUT
+                    )
+                except (requests.ConnectionError, requests.Timeout):
+                    if last_attempt:
+                        raise
+                    response = None
+
+            if response is None:
+                await asyncio.sleep(backoff)
+            elif response.status_code in RETRY_STATUSES and not last_attempt:
+                if response.status_code == 429:
+                    # every request waits, not only this one
+                    self.bucket.pause(_retry_after(response, backoff))
+                else:
+                    await asyncio.sleep(backoff)
+            else:
+                response.raise_for_status()
+                return response.json()
+
+
+class SyncOmdbClient:
+    """Blocking front end of an `OmdbClient` running on its own event loop
+    thread. Safe to call from several threads, concurrent identical
+    lookups of all threads are coalesced."""
+
+    def __init__(self, api_key: str | None = None, **options) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="omdb-client", daemon=True
+        )
+        self.thread.start()
+        self.client = self._run(self._create(api_key, options))
+
+    @staticmethod
+    async def _create(api_key, options) -> OmdbClient:
+        # asyncio primitives belong to the loop they are created on
+        return OmdbClient(api_key, **options)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def movie(self, title: str) -> dict:
+        return self._run(self.client.movie(title))
+
+    def movie_by_id(self, imdb_id: str) -> dict:
+        return self._run(self.client.movie_by_id(imdb_id))
+
+    def run(self, function):
+        """Run the coroutine `function(client)` on the event loop thread
+        and return its result, for batches of lookups."""
+        return self._run(function(self.client))
+
+    def close(self) -> None:
+        self.client.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,140 @@
+"""
+Paged, buffered terminal output for movie listings.
+
+Printing one line per movie makes terminal I/O dominate large listings.
+Here a page is rendered into one string and written with a single call.
+Listings that do not fit the terminal are shown in an interactive pager
+that slices only the visible page out of the sorted movie list and can jump
+to a year, rating or first letter with a binary search.
+
+Usage:
+    MoviePager(sorted_movies, "Year", descending=True).run()
+"""
+
+import shutil
+import sys
+from bisect import bisect_left, bisect_right
+
+import utility as helper
+from storage.istorage import RATING, TITLE, YEAR
+
+# lines kept free for the page header and the pager prompt
+RESERVED_LINES = 4
+
+
+def format_movie(movie: dict) -> str:
+    return f"{movie[TITLE]} ({movie[YEAR]}): {movie[RATING]}"
+
+
+def render_lines(movies) -> str:
+    """Render movies into one block of text, one movie per line."""
+    return "\n".join(map(format_movie, movies)) + "\n"
+
+
+def write(text: str) -> None:
+    """Write a rendered block with a single write call."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def page_size() -> int:
+    """Number of movies that fit the terminal below the page header."""
+    return max(shutil.get_terminal_size().lines - RESERVED_LINES, 5)
+
+
+class MoviePager:
+    """Interactive pager over a sorted movie list.
+
+    Attributes:
+        movies (list): Movies in display order.
+        field (str): The movie key the list is sorted by.
+        descending (bool): True if the list is sorted from high to low.
+    """
+
+    HELP = "[enter] next  p previous  g <page>  j <year|rating|letter>  q quit"
+
+    def __init__(
+        self, movies, field=TITLE, descending=False, size=None, keys=None
+    ):
+        """`keys` are the ascending sort keys of `movies` if they are known
+        already, like the `sort_keys` of a `MovieSnapshot`."""
+        self.movies = movies
+        self.field = field
+        self.descending = descending
+        self.size = size or page_size()
+        self.page = 0
+        # ascending sort keys, jumps are binary searches in them
+        if keys is None:
+            keys = [self._key(movie[field]) for movie in movies]
+            keys = keys[::-1] if descending else keys
+        self.keys = keys
+
+    @property
+    def page_count(self) -> int:
+        return max((len(self.movies) - 1) // self.size + 1, 1)
+
+    def _key(self, value):
+        return value.casefold() if isinstance(value, str) else value
+
+    def render_page(self) -> str:
+        start = self.page * self.size
+        header = (
+            f"Page {self.page + 1}/{self.page_count}, "
+            + f"{len(self.movies)} movies sorted by {self.field.lower()}\n"
+        )
+        return header + render_lines(self.movies[start : start + self.size])
+
+    def jump_to(self, value) -> None:
+        """Go to the page of the first movie at `value` in sort order.
+        Titles jump to the first title starting with `value`."""
+        value = self._key(value)
+        if self.descending:
+            position = len(self.keys) - bisect_right(self.keys, value)
+        else:
+            position = bisect_left(self.keys, value)
+        position = min(position, len(self.movies) - 1)
+        self.page = max(position, 0) // self.size
+
+    def _parse_jump(self, text: str):
+        if self.field == YEAR:
+            return int(text)
+        if self.field == RATING:
+            return float(text)
+        return text
+
+    def run(self) -> None:
+        """Show pages until the user quits or pages past the end."""
+        while True:
+            write(self.render_page())
+            command = input(self.HELP + ": ").strip()
+            name, _, argument = command.partition(" ")
+            name = name.lower()
+
+            if name == "q":
+                return
+            if name == "":
+                if self.page + 1 >= self.page_count:
+                    return
+                self.page += 1
+            elif name == "p":
+                self.page = max(self.page - 1, 0)
+            elif name == "g" and argument.isdigit():
+                self.page = min(max(int(argument) - 1, 0), self.page_count - 1)
+            elif name == "j" and argument:
+                try:
+                    self.jump_to(self._parse_jump(argument.strip()))
+                except ValueError:
+                    helper.print_color(
+                        f"Jump to a {self.field.lower()}!", "red"
+                    )
+            else:
+                helper.print_color("Unknown pager command!", "red")
+
+
+def show_movies(movies, field=TITLE, descending=False) -> None:
+    """Write movies at once if they fit the terminal, page them otherwise."""
+    if len(movies) <= page_size():
+        write(render_lines(movies))
+        helper.enter_to_continue()
+    else:
+        MoviePager(movies, field, descending).run()
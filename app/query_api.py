@@ -0,0 +1,430 @@
+"""
+Read-optimized JSON query API over a movie storage.
+
+All reads are answered from an immutable `MovieSnapshot` with prebuilt
+lookup tables and sort orders. Request threads only read the current
+snapshot reference, so they never take a lock. Writes are serialized by a
+lock, saved to the storage and published by swapping in a new snapshot.
+Changes made to the database by other programs are picked up when the
+storage reports a newer modification time.
+
+Endpoints:
+- GET /movies?offset=0&limit=50&sort=rating&order=desc
+       &min_year=&max_year=&min_rating=&max_rating=
+- GET /movies/id/<imdb_id>
+- GET /movies/title/<title>
+- GET /search?q=<text>&limit=20
+- GET /filter?q=<expression>&offset=0&limit=50 with a filter expression
+  like 'year>=1990 and rating>7.5 order by rating desc', see `movie_filter`
+- GET /stats
+- POST /movies with a JSON movie {"title", "year", "rating", "poster", "id"}
+  and optionally "genre", "director", "actors", "plot" and "runtime"
+- DELETE /movies/title/<title>
+
+Usage:
+    Call `serve_api(storage, host, port)`.
+"""
+
+import json
+import statistics
+import threading
+import time
+import traceback
+from bisect import bisect_left, bisect_right
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from movie_filter import FilterSyntaxError, compile_query, sort_key
+from storage.istorage import DETAILS, ID, RATING, TITLE, YEAR
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8001
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+# how often readers look at the storage for changes made by others
+RELOAD_INTERVAL = 1.0
+SORT_FIELDS = {"title": TITLE, "year": YEAR, "rating": RATING}
+
+
+class QueryError(ValueError):
+    """Invalid query, answered with 400 Bad Request."""
+
+
+class MovieSnapshot:
+    """Immutable view of all movies with lookup tables and sort orders.
+    Never modified after construction, safe to share between threads.
+    """
+
+    def __init__(self, movies: list[dict], last_modified: float) -> None:
+        self.movies = tuple(movies)
+        self.last_modified = last_modified
+        self.by_id = {movie[ID]: movie for movie in self.movies if movie[ID]}
+        self.by_title = {movie[TITLE].casefold(): movie for movie in movies}
+        # storage order of every movie, restores it for slices of sort orders
+        self.positions = {
+            id(movie): position for position, movie in enumerate(self.movies)
+        }
+        # titles ignore case, like the menu and filter expressions sort them
+        self.sorted_by = {
+            field: sorted(self.movies, key=sort_key(field))
+            for field in SORT_FIELDS.values()
+        }
+        self.sort_keys = {
+            field: list(map(sort_key(field), movies))
+            for field, movies in self.sorted_by.items()
+        }
+        self.stats = self._get_stats()
+
+    def _get_stats(self) -> dict:
+        if not self.movies:
+            return {"count": 0}
+        ratings = self.sort_keys[RATING]
+        best, worst = ratings[-1], ratings[0]
+        return {
+            "count": len(self.movies),
+            "average_rating": sum(ratings) / len(ratings),
+            "median_rating": statistics.median(ratings),
+            "best_rating": best,
+            "worst_rating": worst,
+            "best_movies": [
+                movie[TITLE]
+                for movie in self.movies
+                if movie[RATING] == best
+            ],
+            "worst_movies": [
+                movie[TITLE]
+                for movie in self.movies
+                if movie[RATING] == worst
+            ],
+        }
+
+    def range(self, field: str, low=None, high=None) -> list[dict]:
+        """Return movies with `low <= field <= high` in ascending
+        order, found by binary search in the sort order of `field`."""
+        keys = self.sort_keys[field]
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return self.sorted_by[field][start:end]
+
+
+class MovieQueryService:
+    """Answers queries from the current snapshot and serializes writes."""
+
+    def __init__(self, storage) -> None:
+        self.storage = storage
+        self.write_lock = threading.Lock()
+        # taken without blocking, readers never wait for a reload
+        self.reload_lock = threading.Lock()
+        self.checked_at = time.monotonic()
+        self.snapshot = self._load_snapshot()
+
+    def _load_snapshot(self) -> MovieSnapshot:
+        last_modified = self.storage.last_modified()
+        return MovieSnapshot(self.storage.get_movie_data(), last_modified)
+
+    def current(self) -> MovieSnapshot:
+        """Return the current snapshot without waiting for any lock.
+
+        At most once per `RELOAD_INTERVAL` the storage is checked for
+        changes made by someone else. One reader then loads the new
+        snapshot, all others keep reading the old one meanwhile. While a
+        write is running nothing is reloaded, the writer publishes its
+        own snapshot.
+        """
+        snapshot = self.snapshot
+        now = time.monotonic()
+        if now - self.checked_at < RELOAD_INTERVAL:
+            return snapshot
+        self.checked_at = now
+        if self.storage.last_modified() == snapshot.last_modified:
+            return snapshot
+        if self.write_lock.locked():
+            return snapshot
+        if not self.reload_lock.acquire(blocking=False):
+            return snapshot
+        try:
+            loaded = self._load_snapshot()
+            # a writer may have published a newer one in the meantime
+            if loaded.last_modified >= self.snapshot.last_modified:
+                self.snapshot = loaded
+            return self.snapshot
+        finally:
+            self.reload_lock.release()
+
+    def list_movies(
+        self,
+        offset=0,
+        limit=DEFAULT_LIMIT,
+        sort="title",
+        order="asc",
+        min_year=None,
+        max_year=None,
+        min_rating=None,
+        max_rating=None,
+    ) -> dict:
+        """Return one page of movies, sorted and filtered by ranges."""
+        if sort not in SORT_FIELDS:
+            raise QueryError(f"Sort must be one of {tuple(SORT_FIELDS)}!")
+        if order not in ("asc", "desc"):
+            raise QueryError("Order must be 'asc' or 'desc'!")
+        if offset < 0 or not 0 < limit <= MAX_LIMIT:
+            raise QueryError(f"Offset must be >= 0, limit 1-{MAX_LIMIT}!")
+
+        snapshot = self.current()
+        sort_field = SORT_FIELDS[sort]
+        ranges = {
+            YEAR: (min_year, max_year),
+            RATING: (min_rating, max_rating),
+        }
+
+        if sort_field in ranges:
+            # the sort order doubles as index for the range of its field
+            movies = snapshot.range(sort_field, *ranges.pop(sort_field))
+        else:
+            movies = snapshot.sorted_by[sort_field]
+        for field, (low, high) in ranges.items():
+            if low is not None or high is not None:
+                movies = [
+                    movie
+                    for movie in movies
+                    if (low is None or movie[field] >= low)
+                    and (high is None or movie[field] <= high)
+                ]
+
+        if order == "desc":
+            # slice from the end instead of reversing the whole list
+            end = max(len(movies) - offset, 0)
+            page = movies[max(end - limit, 0) : end][::-1]
+        else:
+            page = movies[offset : offset + limit]
+        return {
+            "total": len(movies),
+            "offset": offset,
+            "limit": limit,
+            "movies": list(page),
+        }
+
+    def filter_movies(
+        self, expression: str, offset=0, limit=DEFAULT_LIMIT
+    ) -> dict:
+        """Return one page of the movies matching a filter expression,
+        using the sort orders of the snapshot as indexes."""
+        if offset < 0 or not 0 < limit <= MAX_LIMIT:
+            raise QueryError(f"Offset must be >= 0, limit 1-{MAX_LIMIT}!")
+        try:
+            query = compile_query(expression)
+        except FilterSyntaxError as error:
+            raise QueryError(f"{error}")
+
+        snapshot = self.current()
+        movies = query.run(snapshot.movies, snapshot)
+        return {
+            "total": len(movies),
+            "offset": offset,
+            "limit": limit,
+            "movies": movies[offset : offset + limit],
+        }
+
+    def get_by_id(self, imdb_id: str) -> dict | None:
+        return self.current().by_id.get(imdb_id)
+
+    def get_by_title(self, title: str) -> dict | None:
+        return self.current().by_title.get(title.casefold())
+
+    def search(self, text: str, limit=20) -> list[dict]:
+        """Return movies containing `text` in their title, titles
+        starting with it first, then by rating."""
+        if not text:
+            raise QueryError("Search text must not be empty!")
+        text = text.casefold()
+        matches = [
+            movie
+            for title, movie in self.current().by_title.items()
+            if text in title
+        ]
+        matches.sort(
+            key=lambda movie: (
+                not movie[TITLE].casefold().startswith(text),
+                -movie[RATING],
+            )
+        )
+        return matches[:limit]
+
+    def stats(self) -> dict:
+        return self.current().stats
+
+    def add_movie(self, movie: dict) -> dict:
+        """Save a new movie and publish a new snapshot.
+
+        Raises:
+            QueryError: If fields are missing or the title exists.
+        """
+        try:
+            title = str(movie["title"])
+            year = int(movie["year"])
+            rating = float(movie["rating"])
+        except (KeyError, TypeError, ValueError):
+            raise QueryError("Movie needs a title, a year and a rating!")
+
+        with self.write_lock:
+            if title.casefold() in self.snapshot.by_title:
+                raise QueryError(f"Movie '{title}' already exists!")
+            self.storage._add_movie(
+                title,
+                year,
+                rating,
+                str(movie.get("poster", "")),
+                str(movie.get("id", "")),
+                {key: movie.get(key.lower(), "") for key in DETAILS},
+            )
+            self.snapshot = self._load_snapshot()
+            return self.snapshot.by_title[title.casefold()]
+
+    def delete_movie(self, title: str) -> bool:
+        """Delete a movie and publish a new snapshot.
+
+        Returns:
+            bool: False if the movie does not exist.
+        """
+        with self.write_lock:
+            if title.casefold() not in self.snapshot.by_title:
+                return False
+            self.storage._delete_movie(title)
+            self.snapshot = self._load_snapshot()
+            return True
+
+
+def _number(query: dict, name: str, convert, default=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return convert(values[0])
+    except ValueError:
+        raise QueryError(f"'{name}' must be a number!")
+
+
+class QueryApiHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to a `MovieQueryService`."""
+
+    service: MovieQueryService = None
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._handle(self._get)
+
+    def do_POST(self) -> None:
+        self._handle(self._post)
+
+    def do_DELETE(self) -> None:
+        self._handle(self._delete)
+
+    def _handle(self, route) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        try:
+            status, body = route(parts, parse_qs(url.query))
+        except QueryError as error:
+            status, body = HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except Exception:
+            traceback.print_exc()
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            body = {"error": "Internal server error!"}
+        self._send_json(status, body)
+
+    def _get(self, parts: list[str], query: dict):
+        service = self.service
+        if parts == ["movies"]:
+            return HTTPStatus.OK, service.list_movies(
+                offset=_number(query, "offset", int, 0),
+                limit=_number(query, "limit", int, DEFAULT_LIMIT),
+                sort=query.get("sort", ["title"])[0],
+                order=query.get("order", ["asc"])[0],
+                min_year=_number(query, "min_year", int),
+                max_year=_number(query, "max_year", int),
+                min_rating=_number(query, "min_rating", float),
+                max_rating=_number(query, "max_rating", float),
+            )
+        if len(parts) == 3 and parts[:2] == ["movies", "id"]:
+            return self._found(service.get_by_id(parts[2]))
+        if len(parts) == 3 and parts[:2] == ["movies", "title"]:
+            return self._found(service.get_by_title(parts[2]))
+        if parts == ["search"]:
+            return HTTPStatus.OK, service.search(
+                query.get("q", [""])[0], _number(query, "limit", int, 20)
+            )
+        if parts == ["filter"]:
+            return HTTPStatus.OK, service.filter_movies(
+                query.get("q", [""])[0],
+                offset=_number(query, "offset", int, 0),
+                limit=_number(query, "limit", int, DEFAULT_LIMIT),
+            )
+        if parts == ["stats"]:
+            return HTTPStatus.OK, service.stats()
+        return HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint!"}
+
+    def _post(self, parts: list[str], query: dict):
+        if parts != ["movies"]:
+            return HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint!"}
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # the end of the body is unknown, the connection cannot be reused
+            self.close_connection = True
+            raise QueryError("Content-Length must be a number!")
+        try:
+            movie = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise QueryError("Body must be a JSON movie!")
+        if not isinstance(movie, dict):
+            raise QueryError("Body must be a JSON movie!")
+        return HTTPStatus.CREATED, self.service.add_movie(movie)
+
+    def _delete(self, parts: list[str], query: dict):
+        if len(parts) != 3 or parts[:2] != ["movies", "title"]:
+            return HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint!"}
+        if not self.service.delete_movie(parts[2]):
+            return HTTPStatus.NOT_FOUND, {"error": "Movie not found!"}
+        return HTTPStatus.OK, {"deleted": parts[2]}
+
+    def _found(self, movie):
+        if movie is None:
+            return HTTPStatus.NOT_FOUND, {"error": "Movie not found!"}
+        return HTTPStatus.OK, movie
+
+    def _send_json(self, status: HTTPStatus, body) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def create_api_server(
+    storage, host=DEFAULT_HOST, port=DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """Create a threaded JSON API server for `storage`."""
+    handler = type(
+        "BoundQueryApiHandler",
+        (QueryApiHandler,),
+        {"service": MovieQueryService(storage)},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_api(storage, host=DEFAULT_HOST, port=DEFAULT_PORT) -> None:
+    """Serve the JSON API until interrupted with Ctrl+C."""
+    with create_api_server(storage, host, port) as server:
+        print(f"Serving movie API on http://{host}:{port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
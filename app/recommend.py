@@ -0,0 +1,161 @@
+"""
+"Movies like this" recommendations by feature similarity.
+
+Every movie becomes one row of a feature matrix built from its year,
+rating, genres and title words. Rows are normalized, so the cosine
+similarity of a movie to the whole library is a single matrix-vector
+product and the best matches are picked with a partial sort.
+
+Feature blocks, each scaled to the length of its weight:
+    year, rating   angle on a quarter circle, close values point the same way
+    genres         one-hot per genre of the library
+    title words    hashed into a fixed number of buckets
+
+Usage:
+    recommender = MovieRecommender(storage.get_movie_data())
+    recommender.similar("The Matrix")  # [(movie, similarity), ...]
+"""
+
+import math
+import zlib
+
+import numpy as np
+
+from fulltext_index import tokenize
+from storage.istorage import GENRE, NOT_AVAILABLE, RATING, TITLE, YEAR
+
+DEFAULT_RECOMMENDATIONS = 10
+TITLE_BUCKETS = 128
+# words that make titles look alike without saying anything about them
+STOP_WORDS = {"a", "an", "and", "in", "of", "on", "the", "to"}
+GENRE_WEIGHT = 1.0
+TITLE_WEIGHT = 0.7
+YEAR_WEIGHT = 0.6
+RATING_WEIGHT = 0.4
+MAX_RATING = 10.0
+
+
+def genres_of(movie: dict) -> list[str]:
+    """Split OMDb genres like 'Action, Sci-Fi', 'N/A' is no genre."""
+    genres = str(movie.get(GENRE) or "")
+    return [
+        genre.strip().casefold()
+        for genre in genres.split(",")
+        if genre.strip() and genre.strip() != NOT_AVAILABLE
+    ]
+
+
+def title_buckets(title: str) -> list[int]:
+    """Hash the title words into buckets, stable across runs."""
+    return [
+        zlib.crc32(word.encode()) % TITLE_BUCKETS
+        for word in tokenize(title)
+        if word not in STOP_WORDS
+    ]
+
+
+def _normalize_rows(block: np.ndarray, weight: float) -> np.ndarray:
+    """Scale every non-empty row of `block` to the length `weight`."""
+    lengths = np.linalg.norm(block, axis=1, keepdims=True)
+    lengths[lengths == 0] = 1
+    block *= weight / lengths
+    return block
+
+
+def _angles(values: np.ndarray, low: float, high: float, weight: float):
+    """Map values to (cos, sin) of an angle between 0 and 90 degrees."""
+    span = high - low or 1
+    angles = np.clip((values - low) / span, 0, 1) * (math.pi / 2)
+    return np.column_stack((np.cos(angles), np.sin(angles))) * weight
+
+
+class MovieRecommender:
+    """Normalized feature matrix of a movie library.
+
+    Attributes:
+        movies (list): The movies in the order of the matrix rows.
+        matrix (np.ndarray): One unit-length float32 row per movie.
+        last_modified (float): Modification time of the database
+        the matrix was built from.
+    """
+
+    def __init__(self, movies, last_modified=0.0) -> None:
+        self.movies = list(movies)
+        self.last_modified = last_modified
+        self.rows = {
+            movie[TITLE].casefold(): row
+            for row, movie in enumerate(self.movies)
+        }
+        self.genres = sorted(
+            {genre for movie in self.movies for genre in genres_of(movie)}
+        )
+        self.matrix = self._build_matrix()
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def _build_matrix(self) -> np.ndarray:
+        count = len(self.movies)
+        years = np.fromiter(
+            (movie[YEAR] for movie in self.movies), np.float32, count
+        )
+        ratings = np.fromiter(
+            (movie[RATING] for movie in self.movies), np.float32, count
+        )
+        low_year = years.min() if count else 0
+        high_year = years.max() if count else 0
+
+        genre_columns = {
+            genre: column for column, genre in enumerate(self.genres)
+        }
+        genres = np.zeros((count, len(self.genres)), np.float32)
+        titles = np.zeros((count, TITLE_BUCKETS), np.float32)
+        for row, movie in enumerate(self.movies):
+            for genre in genres_of(movie):
+                genres[row, genre_columns[genre]] = 1
+            for bucket in title_buckets(movie[TITLE]):
+                titles[row, bucket] += 1
+
+        matrix = np.hstack((
+            _angles(years, low_year, high_year, YEAR_WEIGHT),
+            _angles(ratings, 0, MAX_RATING, RATING_WEIGHT),
+            _normalize_rows(genres, GENRE_WEIGHT),
+            _normalize_rows(titles, TITLE_WEIGHT),
+        )).astype(np.float32)
+        # year and rating are never empty, so no row has length zero
+        return _normalize_rows(matrix, 1.0)
+
+    def similar(
+        self, title: str, limit=DEFAULT_RECOMMENDATIONS
+    ) -> list[tuple[dict, float]]:
+        """Return up to `limit` movies most similar to `title`
+        as (movie, cosine similarity) pairs, the most similar first.
+
+        Raises:
+            KeyError: If no movie is called `title`, ignoring case.
+        """
+        row = self.rows[title.casefold()]
+        return self.similar_to_rows([row], limit)[0]
+
+    def similar_to_rows(
+        self, rows: list[int], limit=DEFAULT_RECOMMENDATIONS
+    ) -> list[list[tuple[dict, float]]]:
+        """Answer several queries with one matrix product, the movies
+        of `rows` themselves are left out of their results."""
+        # one row of scores per query movie
+        scores = self.matrix[rows] @ self.matrix.T
+        scores[range(len(rows)), rows] = -np.inf
+        limit = min(limit, len(self.movies) - 1)
+        if limit <= 0:
+            return [[] for _ in rows]
+
+        results = []
+        for movie_scores in scores:
+            # partial sort, only the best `limit` scores get ordered
+            best = np.argpartition(movie_scores, -limit)[-limit:]
+            best = best[np.argsort(movie_scores[best])[::-1]]
+            results.append([
+                (self.movies[index], float(movie_scores[index]))
+                for index in best
+            ])
+        return results
@@ -0,0 +1,165 @@
+"""
+Background refresh of ratings and posters from the OMDB API.
+
+Movies whose last fetch is older than a configurable age are re-queried by
+IMDb ID with the asynchronous `OmdbClient` shared with all other lookups, a
+bounded number of requests at a time under the shared rate limit. Changed ratings, posters and metadata are
+written back to the storage in one batched update.
+
+Usage:
+    Call `refresh_movies(storage)` or start it in a daemon thread with
+    `start_background_refresh(storage)`.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+
+from movie_api import run_on_shared_client
+from storage.istorage import (
+    DETAILS,
+    ID,
+    NOT_AVAILABLE,
+    POSTER,
+    RATING,
+    UPDATED,
+)
+
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_WORKERS = 8
+# OMDb free keys allow 1000 requests a day, keep bursts polite
+DEFAULT_RATE_LIMIT = 10.0
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass
+class RefreshResult:
+    checked: int = 0
+    changed: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second."""
+        return self.checked / self.seconds if self.seconds else 0.0
+
+
+def stale_movies(movies: list[dict], max_age_days: float) -> list[dict]:
+    """Return movies with an IMDb ID fetched more than `max_age_days` ago."""
+    oldest = time.time() - max_age_days * SECONDS_PER_DAY
+    return [
+        movie for movie in movies if movie[ID] and movie[UPDATED] < oldest
+    ]
+
+
+def _changes_from_response(movie: dict, response: dict) -> dict:
+    """Return the refreshed fields of `movie`, always including the new
+    fetch time. Ratings OMDb does not know ('N/A') are kept."""
+    changes = {UPDATED: int(time.time())}
+    try:
+        rating = float(response["imdbRating"])
+    except (KeyError, ValueError):
+        rating = movie[RATING]
+    if rating != movie[RATING]:
+        changes[RATING] = rating
+    poster = response.get("Poster", movie[POSTER])
+    if poster != movie[POSTER]:
+        changes[POSTER] = poster
+    # also fills in metadata of movies added before it was stored
+    for key in DETAILS:
+        value = response.get(key, NOT_AVAILABLE)
+        if value != NOT_AVAILABLE and value != movie.get(key):
+            changes[key] = value
+    return changes
+
+
+def refresh_movies(
+    storage,
+    max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    workers: int = DEFAULT_WORKERS,
+    rate_limit: float = DEFAULT_RATE_LIMIT,
+    progress=None,
+) -> RefreshResult:
+    """Re-fetch stale movies from OMDb and save all changes at once.
+
+    Arguments:
+        storage -- the movie storage to refresh
+
+    Keyword Arguments:
+        max_age_days -- refresh movies fetched longer ago (default: {30})
+        workers -- number of concurrent requests (default: {8})
+        rate_limit -- maximum requests per second, applies only if no
+        other lookup created the shared client yet (default: {10.0})
+        progress -- called with (done, total, result) after every request
+    """
+    result = RefreshResult()
+    stale = stale_movies(storage.get_movie_data(), max_age_days)
+    start = time.perf_counter()
+    updates = run_on_shared_client(
+        lambda client: _fetch_updates(
+            client, stale, workers, result, progress
+        ),
+        rate=rate_limit,
+        concurrency=workers,
+    )
+
+    if updates:
+        # re-read under the write lock to keep edits made meanwhile
+        with storage.write_lock:
+            movies = storage.get_movie_data()
+            for movie in movies:
+                movie.update(updates.get(movie[ID], {}))
+            storage._save_movies(movies)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+async def _fetch_updates(
+    client, stale, workers, result, progress
+) -> dict[str, dict]:
+    """Request all stale movies and return their changes by IMDb ID,
+    counting checked, changed and failed movies in `result`."""
+    start = time.perf_counter()
+    updates = {}
+    # at most `workers` refresh lookups wait for the shared rate limit,
+    # so interactive lookups are not queued behind the whole batch
+    semaphore = asyncio.Semaphore(workers)
+
+    async def fetch(movie: dict):
+        try:
+            async with semaphore:
+                return movie, await client.movie_by_id(movie[ID])
+        except Exception:
+            return movie, None
+
+    for next_done in asyncio.as_completed(map(fetch, stale)):
+        movie, response = await next_done
+        result.checked += 1
+        if response is not None and response.get("Response") == "True":
+            changes = _changes_from_response(movie, response)
+            if len(changes) > 1:
+                result.changed += 1
+            updates[movie[ID]] = changes
+        else:
+            result.failed += 1
+        result.seconds = time.perf_counter() - start
+        if progress:
+            progress(result.checked, len(stale), result)
+    return updates
+
+
+def start_background_refresh(storage, **options) -> threading.Thread:
+    """Run `refresh_movies` once in a daemon thread without progress output,
+    so it does not interfere with the interactive menu."""
+    thread = threading.Thread(
+        target=refresh_movies,
+        args=(storage,),
+        kwargs=options,
+        name="ratings-refresh",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,66 @@
+"""
+Transparent compression of text database files, selected by extension.
+
+`movie_db.json.gz` is a gzip compressed JSON database, `movie_db.csv.zst`
+a zstandard compressed CSV database. Files are opened as text streams that
+decompress while the parser reads them, so the decompressed file never
+has to be held in memory or written to disk. zstandard support needs the
+optional `zstandard` package.
+
+Functions:
+- get_compression(file_path: str) -> str: Returns '.gz', '.zst' or ''.
+- strip_compression(file_path: str) -> str: Removes the compression suffix.
+- open_text(file_path: str, mode: str) -> TextIO: Opens a file for reading
+  or writing text, compressed according to its extension.
+"""
+
+import gzip
+import os
+from typing import TextIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = ".gz"
+ZSTD = ".zst"
+COMPRESSIONS = (GZIP, ZSTD)
+# databases are read far more often than written, favour small files
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def get_compression(file_path: str) -> str:
+    """Return the compression suffix of `file_path`, '' if uncompressed."""
+    extension = os.path.splitext(file_path)[1].lower()
+    return extension if extension in COMPRESSIONS else ""
+
+
+def strip_compression(file_path: str) -> str:
+    """Return `file_path` without its compression suffix."""
+    compression = get_compression(file_path)
+    return file_path[: -len(compression)] if compression else file_path
+
+
+def open_text(file_path: str, mode: str = "r") -> TextIO:
+    """Open `file_path` for reading ('r') or writing ('w') text.
+
+    Raises:
+        ImportError: For '.zst' files if zstandard is not installed.
+    """
+    compression = get_compression(file_path)
+    if compression == GZIP:
+        return gzip.open(file_path, mode + "t", compresslevel=GZIP_LEVEL)
+    if compression == ZSTD:
+        if zstandard is None:
+            raise ImportError(
+                f"Opening '{file_path}' needs the zstandard package, "
+                + "install it with: pip install zstandard"
+            )
+        return zstandard.open(
+            file_path,
+            mode + "t",
+            cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL),
+        )
+    return open(file_path, mode)
@@ -3,17 +3,77 @@ IStorage interface defines methods for movie storage operations.
 
 Methods:
 - _list_movies() -> dict[str, dict]: Returns a dictionary of movies with ratings and years.
-- _add_movie(title: str, year: int, rating: float, poster: str) -> None: Adds a movie to the database.
+- _add_movie(title: str, year: int, rating: float, poster: str, imdb_id: str, details: dict) -> None: Adds a movie to the database.
 - _delete_movie(title: str) -> None: Deletes a movie from the database.
+- last_modified() -> float: Returns the time the database was last saved.
+
+Storages hold their reentrant `write_lock` while movies are read, changed
+and saved, so threads sharing a storage, like the menu and a background
+refresh, never overwrite each other's changes. Saves write a temporary file
+and rename it over the database, so readers never see a half-written file.
 """
 
+import os
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator
 
 # Movie dictionary keys
 TITLE = "Title"
 YEAR = "Year"
 RATING = "Rating"
 POSTER = "Poster"
+ID = "ID"
+# unix timestamp of the last fetch from OMDb, 0 when unknown
+UPDATED = "Updated"
+# extended OMDb metadata, stored as text like OMDb returns it
+GENRE = "Genre"
+DIRECTOR = "Director"
+ACTORS = "Actors"
+PLOT = "Plot"
+RUNTIME = "Runtime"
+DETAILS = (GENRE, DIRECTOR, ACTORS, PLOT, RUNTIME)
+# what OMDb returns for unknown values, stored as empty text
+NOT_AVAILABLE = "N/A"
+
+
+def get_details(details: dict | None) -> dict[str, str]:
+    """Return all extended metadata fields, missing and
+    `NOT_AVAILABLE` ones as empty text."""
+    details = details or {}
+    values = {key: str(details.get(key) or "") for key in DETAILS}
+    return {
+        key: "" if value == NOT_AVAILABLE else value
+        for key, value in values.items()
+    }
+
+
+def movie_key(movie: dict) -> str:
+    """Movies are identified by IMDb ID, movies without one by title."""
+    return movie[ID] or "title:" + movie[TITLE].casefold()
+
+
+@contextmanager
+def replace_on_success(file_path: str) -> Iterator[str]:
+    """Yield a temporary path next to `file_path` to write the new file to.
+    It replaces `file_path` in one rename once the block finished, and is
+    removed if the block raised. The temporary file keeps the extension,
+    so compression is chosen the same way.
+    """
+    directory, name = os.path.split(file_path)
+    stem, extension = os.path.splitext(name)
+    temp_path = os.path.join(
+        directory,
+        f".{stem}-{os.getpid()}-{threading.get_ident()}.tmp{extension}",
+    )
+    try:
+        yield temp_path
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
 
 class IStorage(ABC):
@@ -36,11 +96,14 @@ class IStorage(ABC):
         pass
 
     @abstractmethod
-    def _add_movie(self, title, year, rating, poster, imdb_id) -> None:
+    def _add_movie(
+        self, title, year, rating, poster, imdb_id, details=None
+    ) -> None:
         """
         Adds a movie to the movies database.
         Loads the information from the JSON file, add the movie,
         and saves it. The function doesn't need to validate the input.
+        `details` optionally holds the extended metadata (DETAILS keys).
         """
         pass
 
@@ -52,3 +115,11 @@ class IStorage(ABC):
         and saves it. The function doesn't need to validate the input.
         """
         pass
+
+    def last_modified(self) -> float:
+        """
+        Returns the modification time of the database file as a unix
+        timestamp. It changes whenever the movies are saved, caches
+        compare it to find out if they are outdated.
+        """
+        return os.path.getmtime(self.file_path)
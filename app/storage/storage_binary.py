@@ -0,0 +1,323 @@
+"""
+StorageBinary manages movie data in a column-packed binary snapshot file,
+implementing the IStorage interface.
+
+File layout (little-endian):
+- header: magic b"MVDB", format version, movie count, column count
+- column table: for every column its name and type code
+  ("d" float64, "i" int32, "q" int64, "s" utf-8 string)
+- column data, every section aligned to 8 bytes:
+  numeric columns are packed arrays, string columns are an offset array
+  (count + 1 uint32 byte offsets) followed by the utf-8 string table.
+
+`load_snapshot` exposes numeric columns as zero-copy `memoryview`s over
+the file buffer. `get_movie_data` decodes every string table at once,
+`iter_movie_data` decodes one row at a time.
+
+Methods:
+- load_snapshot() -> BinarySnapshot: Loads the columnar view of the file.
+- get_movie_data() -> list[dict]: Loads movie records.
+- iter_movie_data() -> Iterator[dict]: Decodes movie records one by one.
+- _list_movies() -> dict[str, dict]: Retrieves movies with ratings and years.
+- _add_movie(title: str, year: int, rating: float, poster: str, imdb_id: str, details: dict) -> None: Adds a movie.
+- _delete_movie(title: str) -> None: Deletes a movie by title.
+- _save_movies(movies: list[dict]) -> None: Saves movies to the binary file.
+"""
+
+import os
+import threading
+import time
+import struct
+import sys
+from array import array
+from itertools import repeat
+from typing import Iterator
+
+from storage.istorage import (
+    RATING,
+    TITLE,
+    YEAR,
+    POSTER,
+    ID,
+    UPDATED,
+    DETAILS,
+    IStorage,
+    get_details,
+    replace_on_success,
+)
+
+MAGIC = b"MVDB"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+COLUMN_HEADER = struct.Struct("<Bc")
+ALIGNMENT = 8
+
+# column name -> type code, in file order
+COLUMNS = {
+    TITLE: "s",
+    RATING: "d",
+    YEAR: "i",
+    POSTER: "s",
+    ID: "s",
+    UPDATED: "q",
+    **{key: "s" for key in DETAILS},
+}
+
+# values used when a file was written without a column
+DEFAULTS = {"d": 0.0, "i": 0, "q": 0, "s": ""}
+
+NEEDS_BYTESWAP = sys.byteorder != "little"
+
+
+class StringColumn:
+    """Lazily decoded utf-8 string table."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview) -> None:
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return str(self.blob[start:end], "utf-8")
+
+    def tolist(self) -> list[str]:
+        blob = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        if blob.isascii():
+            # byte offsets equal character offsets, decode the table once
+            text = blob.decode("ascii")
+            return [
+                text[start:end] for start, end in zip(offsets, offsets[1:])
+            ]
+        return [
+            blob[start:end].decode("utf-8")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+
+class BinarySnapshot:
+    """Columnar read-only view of a binary movie file.
+
+    Attributes:
+        columns (dict): Maps column names to a numeric `memoryview`
+        or a `StringColumn`, columns the file was written without to a
+        list of defaults.
+    """
+
+    def __init__(self, count: int, columns: dict) -> None:
+        self.count = count
+        self.columns = dict(columns)
+        for name, code in COLUMNS.items():
+            if name not in self.columns:
+                self.columns[name] = [DEFAULTS[code]] * count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, name: str):
+        """Return the column `name`."""
+        return self.columns[name]
+
+    def row(self, index: int) -> dict:
+        """Decode a single movie record."""
+        return {name: self.columns[name][index] for name in COLUMNS}
+
+    def rows(self) -> list[dict]:
+        """Decode all movie records at once."""
+        names = list(COLUMNS)
+        values = [self.columns[name] for name in names]
+        values = [
+            column.tolist() if hasattr(column, "tolist") else column
+            for column in values
+        ]
+        return list(map(dict, map(zip, repeat(names), zip(*values))))
+
+
+def _padding(position: int) -> int:
+    return -position % ALIGNMENT
+
+
+def _to_little_endian(values: array) -> bytes:
+    if NEEDS_BYTESWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _native_view(buffer: memoryview, typecode: str, count: int):
+    size = array(typecode).itemsize * count
+    view = buffer[:size]
+    if NEEDS_BYTESWAP:
+        values = array(typecode, view.tobytes())
+        values.byteswap()
+        return memoryview(values)
+    return view.cast(typecode)
+
+
+def read_snapshot(data: bytes) -> BinarySnapshot:
+    """Parse a binary movie file into a `BinarySnapshot`.
+
+    Raises:
+        ValueError: If the data is not a movie snapshot.
+    """
+    buffer = memoryview(data)
+    magic, version, count, column_count = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a binary movie database!")
+    if version > VERSION:
+        raise ValueError(f"Unsupported binary database version {version}!")
+
+    position = HEADER.size
+    layout = []
+    for _ in range(column_count):
+        name_length, typecode = COLUMN_HEADER.unpack_from(buffer, position)
+        position += COLUMN_HEADER.size
+        name = str(buffer[position : position + name_length], "utf-8")
+        position += name_length
+        layout.append((name, typecode.decode("ascii")))
+
+    columns = {}
+    for name, typecode in layout:
+        position += _padding(position)
+        if typecode == "s":
+            offsets = _native_view(buffer[position:], "I", count + 1)
+            position += offsets.nbytes
+            end = position + (offsets[-1] if count else 0)
+            columns[name] = StringColumn(offsets, buffer[position:end])
+            position = end
+        else:
+            values = _native_view(buffer[position:], typecode, count)
+            position += values.nbytes
+            columns[name] = values
+
+    return BinarySnapshot(count, columns)
+
+
+def write_snapshot(file, movies) -> None:
+    """Write movie records column by column into the open binary `file`.
+
+    Arguments:
+        file -- file object opened in binary write mode
+        movies -- iterable of movie dictionaries
+    """
+    numeric = {
+        name: array(code) for name, code in COLUMNS.items() if code != "s"
+    }
+    strings = {
+        name: (array("I", [0]), bytearray())
+        for name, code in COLUMNS.items()
+        if code == "s"
+    }
+
+    count = 0
+    for movie in movies:
+        count += 1
+        for name, values in numeric.items():
+            values.append(movie.get(name, DEFAULTS[COLUMNS[name]]))
+        for name, (offsets, blob) in strings.items():
+            blob += str(movie.get(name, "")).encode("utf-8")
+            offsets.append(len(blob))
+
+    header = bytearray(HEADER.pack(MAGIC, VERSION, count, len(COLUMNS)))
+    for name, code in COLUMNS.items():
+        encoded_name = name.encode("utf-8")
+        header += COLUMN_HEADER.pack(len(encoded_name), code.encode("ascii"))
+        header += encoded_name
+
+    file.write(header)
+    position = len(header)
+
+    def write_section(data: bytes) -> None:
+        nonlocal position
+        padding = _padding(position)
+        file.write(b"\0" * padding + data)
+        position += padding + len(data)
+
+    for name, code in COLUMNS.items():
+        if code == "s":
+            offsets, blob = strings[name]
+            write_section(_to_little_endian(offsets))
+            file.write(blob)
+            position += len(blob)
+        else:
+            write_section(_to_little_endian(numeric[name]))
+
+
+class StorageBinary(IStorage):
+    def __init__(self, file_path) -> None:
+        self.file_path = file_path
+        self.write_lock = threading.RLock()
+
+        if not os.path.exists(file_path):
+            self.create_new_file()
+
+    def create_new_file(self):
+        self._save_movies([])
+
+    def load_snapshot(self) -> BinarySnapshot:
+        """Load the columnar snapshot. Numeric columns are zero-copy
+        views over the file contents, strings are decoded on access."""
+        with open(self.file_path, "rb") as file:
+            return read_snapshot(file.read())
+
+    def get_movie_data(self) -> list[dict]:
+        return self.load_snapshot().rows()
+
+    def iter_movie_data(self) -> Iterator[dict]:
+        snapshot = self.load_snapshot()
+        for index in range(len(snapshot)):
+            yield snapshot.row(index)
+
+    def _list_movies(self) -> dict[str, dict]:
+        movies = self.get_movie_data()
+        movie_dict = {}
+        if movies:
+            for movie in movies:
+                movie_dict[movie[TITLE]] = {
+                    "rating": movie[RATING],
+                    "year": movie[YEAR],
+                    "poster": movie[POSTER],
+                }
+        return movie_dict
+
+    def _add_movie(
+        self, title, year, rating, poster, imdb_id, details=None
+    ) -> None:
+        with self.write_lock:
+            movies = self.get_movie_data()
+            movies.append({
+                "Title": title,
+                "Rating": float(rating),
+                "Year": int(year),
+                "Poster": poster,
+                "ID": imdb_id,
+                "Updated": int(time.time()),
+                **get_details(details),
+            })
+            self._save_movies(movies)
+
+    def _delete_movie(self, title: str) -> None:
+        with self.write_lock:
+            movies = self.get_movie_data()
+            new_movies = [
+                movie
+                for movie in movies
+                if movie[TITLE].lower() != title.lower()
+            ]
+            self._save_movies(new_movies)
+
+    def _save_movies(self, movies) -> None:
+        """Save movies in binary file.
+
+        Arguments:
+            movies -- iterable of all movies
+        """
+        with (
+            self.write_lock,
+            replace_on_success(self.file_path) as path,
+            open(path, "wb") as file,
+        ):
+            write_snapshot(file, movies)
@@ -3,41 +3,68 @@ StorageCsv manages movie data in a CSV file, implementing the IStorage interface
 
 Methods:
 - get_movie_data() -> list[dict]: Loads movie records.
+- iter_movie_data() -> Iterator[dict]: Streams movie records one by one.
 - _list_movies() -> dict[str, dict]: Retrieves movies with ratings and years.
-- _add_movie(title: str, year: int, rating: float, poster: str = "placeholder") -> None: Adds a movie.
+- _add_movie(title: str, year: int, rating: float, poster: str, imdb_id: str, details: dict) -> None: Adds a movie.
 - _delete_movie(title: str) -> None: Deletes a movie by title.
 - _save_movies(movies: list[dict]) -> None: Saves movies to the JSON file.
+
+Files ending in '.csv.gz' or '.csv.zst' are stored compressed.
 """
 
 import csv
 import os
-
-from storage.istorage import RATING, TITLE, YEAR, POSTER, IStorage
+import threading
+import time
+from typing import Iterator
+
+from storage.compression import open_text
+from storage.istorage import (
+    RATING,
+    TITLE,
+    YEAR,
+    POSTER,
+    DETAILS,
+    IStorage,
+    get_details,
+    replace_on_success,
+)
+
+FIELD_NAMES = ["Title", "Rating", "Year", "Poster", "ID", "Updated", *DETAILS]
+
+
+def _movie_from_row(row: dict) -> dict:
+    return {
+        "Title": row["Title"],
+        "Rating": float(row["Rating"]),
+        "Year": int(row["Year"]),
+        "Poster": row["Poster"],
+        "ID": row["ID"],
+        "Updated": int(row.get("Updated") or 0),
+        **get_details(row),
+    }
 
 
 class StorageCsv(IStorage):
     def __init__(self, file_path) -> None:
         self.file_path = file_path
+        self.write_lock = threading.RLock()
 
         if not os.path.exists(file_path):
             self.create_new_file()
 
     def create_new_file(self):
-        with open(self.file_path, "w") as file:
-            file.write("Title,Rating,Year,Poster,ID")
+        with open_text(self.file_path, "w") as file:
+            file.write(",".join(FIELD_NAMES))
 
     def get_movie_data(self) -> list[dict]:
-        with open(self.file_path, "r") as file:
-            return [
-                {
-                    "Title": row["Title"],
-                    "Rating": float(row["Rating"]),
-                    "Year": int(row["Year"]),
-                    "Poster": row["Poster"],
-                    "ID": row["ID"],
-                }
-                for row in csv.DictReader(file)
-            ]
+        with open_text(self.file_path, "r") as file:
+            return [_movie_from_row(row) for row in csv.DictReader(file)]
+
+    def iter_movie_data(self) -> Iterator[dict]:
+        with open_text(self.file_path, "r") as file:
+            for row in csv.DictReader(file):
+                yield _movie_from_row(row)
 
     def _list_movies(self) -> dict[str, dict]:
         movies = self.get_movie_data()
@@ -51,25 +78,31 @@ class StorageCsv(IStorage):
                 }
         return movie_dict
 
-    def _add_movie(self, title, year, rating, poster, imdb_id) -> None:
-        movies = self.get_movie_data()
-        movies.append({
-            "Title": title,
-            "Rating": float(rating),
-            "Year": int(year),
-            "Poster": poster,
-            "ID": imdb_id,
-        })
-
-        self._save_movies(movies)
+    def _add_movie(
+        self, title, year, rating, poster, imdb_id, details=None
+    ) -> None:
+        with self.write_lock:
+            movies = self.get_movie_data()
+            movies.append({
+                "Title": title,
+                "Rating": float(rating),
+                "Year": int(year),
+                "Poster": poster,
+                "ID": imdb_id,
+                "Updated": int(time.time()),
+                **get_details(details),
+            })
+            self._save_movies(movies)
 
     def _delete_movie(self, title: str) -> None:
-        movies = self.get_movie_data()
-        new_movies = [
-            movie for movie in movies if movie[TITLE].lower() != title.lower()
-        ]
-
-        self._save_movies(new_movies)
+        with self.write_lock:
+            movies = self.get_movie_data()
+            new_movies = [
+                movie
+                for movie in movies
+                if movie[TITLE].lower() != title.lower()
+            ]
+            self._save_movies(new_movies)
 
     def _save_movies(self, movies) -> None:
         """Save movies in json file.
@@ -77,11 +110,11 @@ class StorageCsv(IStorage):
         Arguments:
             movies -- dictionary of all movies
         """
-
-        field_names = ["Title", "Rating", "Year", "Poster", "ID"]
-
-        with open(self.file_path, "w") as file:
-            writer = csv.DictWriter(file, fieldnames=field_names)
+        with (
+            self.write_lock,
+            replace_on_success(self.file_path) as path,
+            open_text(path, "w") as file,
+        ):
+            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
             writer.writeheader()
-            if movies:
-                writer.writerows(movies)
+            writer.writerows(movies)
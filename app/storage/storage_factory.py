@@ -0,0 +1,70 @@
+"""
+Selects the storage implementation for a database file by its extension.
+JSON and CSV databases may be compressed, like 'movie_db.json.gz'.
+
+Functions:
+- get_storage(file_path: str) -> IStorage: Opens the storage for a file.
+- convert_storage(source_path: str, target_path: str) -> int: Copies all movies
+  from one database file into another, translating between formats.
+"""
+
+import os
+
+from storage.compression import get_compression, strip_compression
+from storage.istorage import IStorage
+from storage.storage_binary import StorageBinary
+from storage.storage_csv import StorageCsv
+from storage.storage_json import StorageJson
+
+STORAGE_TYPES = {
+    ".json": StorageJson,
+    ".csv": StorageCsv,
+    ".mvdb": StorageBinary,
+}
+# formats that can be read through a decompressing stream
+COMPRESSIBLE_TYPES = (".json", ".csv")
+
+
+def get_extension(file_path: str) -> str:
+    """Return the lower case file extension used to select the storage,
+    without a compression suffix."""
+    return os.path.splitext(strip_compression(file_path))[1].lower()
+
+
+def get_storage(file_path: str) -> IStorage:
+    """Return the storage matching the extension of `file_path`.
+
+    Raises:
+        ValueError: If the extension belongs to no known storage format.
+    """
+    extension = get_extension(file_path)
+    if extension not in STORAGE_TYPES:
+        raise ValueError(
+            f"Unknown storage format '{extension}'! "
+            + f"Use one of: {', '.join(STORAGE_TYPES)}"
+        )
+    compression = get_compression(file_path)
+    if compression and extension not in COMPRESSIBLE_TYPES:
+        raise ValueError(
+            f"Storage format '{extension}' cannot be compressed! "
+            + f"Use one of: {', '.join(COMPRESSIBLE_TYPES)}"
+        )
+    return STORAGE_TYPES[extension](file_path)
+
+
+def convert_storage(source_path: str, target_path: str) -> int:
+    """Copy all movies from `source_path` into `target_path`.
+    The target file is overwritten.
+
+    Returns:
+        int: Number of converted movies.
+
+    Raises:
+        FileNotFoundError: If the source database does not exist.
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Database '{source_path}' does not exist!")
+
+    movies = get_storage(source_path).get_movie_data()
+    get_storage(target_path)._save_movies(movies)
+    return len(movies)
@@ -3,42 +3,113 @@ StorageJson manages movie data in a JSON file, implementing the IStorage interfa
 
 Methods:
 - get_movie_data() -> list[dict]: Loads movie records.
+- iter_movie_data() -> Iterator[dict]: Streams movie records one by one.
 - _list_movies() -> dict[str, dict]: Retrieves movies with ratings and years.
-- _add_movie(title: str, year: int, rating: float, poster: str = "placeholder") -> None: Adds a movie.
+- _add_movie(title: str, year: int, rating: float, poster: str, imdb_id: str, details: dict) -> None: Adds a movie.
 - _delete_movie(title: str) -> None: Deletes a movie by title.
-- _save_movies(movies: list[dict]) -> None: Saves movies to the JSON file.
+- _save_movies(movies: Iterable[dict]) -> None: Saves movies to the JSON file.
+
+Files ending in '.json.gz' or '.json.zst' are stored compressed.
 """
 
 import json
 import os
+import threading
+import time
+from typing import Iterator
+
+from storage.compression import get_compression, open_text
+from storage.istorage import (
+    RATING,
+    TITLE,
+    YEAR,
+    POSTER,
+    IStorage,
+    get_details,
+    replace_on_success,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(file, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """Decode the items of a top level JSON array one by one,
+    reading the file in chunks instead of loading it at once.
+
+    Raises:
+        ValueError: If the file does not contain a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON database must contain a list of movies!")
+    position = 1
+    end_of_file = False
+
+    while True:
+        # skip whitespace and separators between items
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position == len(buffer):
+            if end_of_file:
+                raise ValueError("Unexpected end of JSON database!")
+            buffer = file.read(chunk_size)
+            position = 0
+            end_of_file = not buffer
+            continue
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+        else:
+            yield item
+
 
-from storage.istorage import RATING, TITLE, YEAR, POSTER, IStorage
+def _movie_from_row(row: dict) -> dict:
+    return {
+        "Title": row["Title"],
+        "Rating": row["Rating"],
+        "Year": row["Year"],
+        "Poster": row["Poster"],
+        "ID": row["ID"],
+        "Updated": row.get("Updated", 0),
+        **get_details(row),
+    }
 
 
 class StorageJson(IStorage):
     def __init__(self, file_path) -> None:
         self.file_path = file_path
+        self.write_lock = threading.RLock()
+        self.compressed = bool(get_compression(file_path))
 
         if not os.path.exists(file_path):
             self.create_new_file()
 
     def create_new_file(self):
-        with open(self.file_path, "w") as file:
+        with open_text(self.file_path, "w") as file:
             file.write("[]")
 
     def get_movie_data(self) -> list[dict]:
-        with open(self.file_path, "r") as file:
-            data = file.read()
-            return [
-                {
-                    "Title": row["Title"],
-                    "Rating": row["Rating"],
-                    "Year": row["Year"],
-                    "Poster": row["Poster"],
-                    "ID": row["ID"],
-                }
-                for row in json.loads(data)
-            ]
+        with open_text(self.file_path, "r") as file:
+            if self.compressed:
+                # decode while decompressing, the text is never held at once
+                rows = iter_json_array(file)
+            else:
+                rows = json.loads(file.read())
+            return [_movie_from_row(row) for row in rows]
+
+    def iter_movie_data(self) -> Iterator[dict]:
+        with open_text(self.file_path, "r") as file:
+            for row in iter_json_array(file):
+                yield _movie_from_row(row)
 
     def _list_movies(self) -> dict[str, dict]:
         movies = self.get_movie_data()
@@ -52,31 +123,51 @@ class StorageJson(IStorage):
                 }
         return movie_dict
 
-    def _add_movie(self, title, year, rating, poster, imdb_id) -> None:
-        movies = self.get_movie_data()
-        movies.append({
-            "Title": title,
-            "Rating": float(rating),
-            "Year": int(year),
-            "Poster": poster,
-            "ID": imdb_id,
-        })
-
-        self._save_movies(movies)
+    def _add_movie(
+        self, title, year, rating, poster, imdb_id, details=None
+    ) -> None:
+        with self.write_lock:
+            movies = self.get_movie_data()
+            movies.append({
+                "Title": title,
+                "Rating": float(rating),
+                "Year": int(year),
+                "Poster": poster,
+                "ID": imdb_id,
+                "Updated": int(time.time()),
+                **get_details(details),
+            })
+            self._save_movies(movies)
 
     def _delete_movie(self, title):
-        movies = self.get_movie_data()
-        new_movies = [
-            movie for movie in movies if movie[TITLE].lower() != title.lower()
-        ]
-
-        self._save_movies(new_movies)
+        with self.write_lock:
+            movies = self.get_movie_data()
+            new_movies = [
+                movie
+                for movie in movies
+                if movie[TITLE].lower() != title.lower()
+            ]
+            self._save_movies(new_movies)
 
     def _save_movies(self, movies) -> None:
-        """Save movies in json file.
+        """Save movies in json file. Lists are dumped at once,
+        other iterables are streamed item by item.
 
         Arguments:
             movies -- dictionary of all movies
         """
-        with open(self.file_path, "w") as fileobj:
-            fileobj.write(json.dumps(movies))
+        with (
+            self.write_lock,
+            replace_on_success(self.file_path) as path,
+            open_text(path, "w") as fileobj,
+        ):
+            if isinstance(movies, list):
+                fileobj.write(json.dumps(movies))
+                return
+
+            fileobj.write("[")
+            for index, movie in enumerate(movies):
+                if index:
+                    fileobj.write(", ")
+                fileobj.write(json.dumps(movie))
+            fileobj.write("]")
@@ -0,0 +1,239 @@
+"""
+StorageSharded spreads movie data over several JSON or CSV shard files,
+implementing the IStorage interface.
+
+Movies are assigned to a shard by a stable hash of their IMDb ID or by their
+decade. Adding and deleting movies only rewrites the affected shard, reads
+fan out over all shards in parallel and merge the results. The shard layout
+is kept in a `manifest.json` next to the shard files.
+
+Methods:
+- get_movie_data() -> list[dict]: Loads movie records from all shards.
+- _list_movies() -> dict[str, dict]: Retrieves movies with ratings and years.
+- _add_movie(title: str, year: int, rating: float, poster: str, imdb_id: str, details: dict) -> None: Adds a movie.
+- _delete_movie(title: str) -> None: Deletes a movie by title.
+- _save_movies(movies: list[dict]) -> None: Distributes movies over the shards.
+- rebalance(shard_count: int, shard_key: str) -> None: Redistributes all movies.
+- last_modified() -> float: Returns the time any shard was last saved.
+"""
+
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from storage.istorage import TITLE, YEAR, ID, IStorage, replace_on_success
+from storage.storage_csv import StorageCsv
+from storage.storage_json import StorageJson
+
+MANIFEST_FILE = "manifest.json"
+DEFAULT_SHARD_COUNT = 8
+SHARD_KEYS = ("id", "decade")
+SHARD_TYPES = {".json": StorageJson, ".csv": StorageCsv}
+
+
+class StorageSharded(IStorage):
+    def __init__(
+        self,
+        directory,
+        shard_count=None,
+        shard_key="id",
+        extension=".json",
+    ) -> None:
+        """Open the shards in `directory`, the layout of an existing
+        manifest wins over the given settings. Use `rebalance` to change it.
+
+        Arguments:
+            directory -- folder holding the shard files and the manifest
+
+        Keyword Arguments:
+            shard_count -- number of shards (default: {8})
+            shard_key -- 'id' or 'decade' (default: {"id"})
+            extension -- '.json' or '.csv' shard files (default: {".json"})
+        """
+        self.directory = directory
+        # shards lock themselves, this lock spans writes over several shards
+        self.write_lock = threading.RLock()
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+
+        if os.path.exists(self.manifest_path):
+            self._load_manifest()
+        else:
+            if shard_key not in SHARD_KEYS:
+                raise ValueError(f"Shard key must be one of {SHARD_KEYS}!")
+            if extension not in SHARD_TYPES:
+                raise ValueError(
+                    f"Shard format must be one of {tuple(SHARD_TYPES)}!"
+                )
+            self.shard_count = shard_count or DEFAULT_SHARD_COUNT
+            self.shard_key = shard_key
+            self.extension = extension
+            self.generation = 0
+            self.create_new_file()
+
+        self.shards = self._open_shards()
+
+    def create_new_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._save_manifest()
+
+    def _load_manifest(self) -> None:
+        with open(self.manifest_path, "r") as file:
+            manifest = json.loads(file.read())
+        self.shard_count = manifest["shards"]
+        self.shard_key = manifest["key"]
+        self.extension = manifest["format"]
+        # layouts written before rebalancing was made atomic have none
+        self.generation = manifest.get("generation", 0)
+
+    def _save_manifest(self) -> None:
+        manifest = {
+            "shards": self.shard_count,
+            "key": self.shard_key,
+            "format": self.extension,
+            "generation": self.generation,
+        }
+        with (
+            replace_on_success(self.manifest_path) as path,
+            open(path, "w") as file,
+        ):
+            file.write(json.dumps(manifest))
+
+    def _open_shards(self) -> list[IStorage]:
+        storage_type = SHARD_TYPES[self.extension]
+        return [
+            storage_type(self._shard_path(index))
+            for index in range(self.shard_count)
+        ]
+
+    def _shard_path(self, index: int) -> str:
+        """Every rebalance writes a new generation of shard files,
+        the first generation keeps the original names."""
+        prefix = f"shard_g{self.generation}_" if self.generation else "shard_"
+        return os.path.join(
+            self.directory, f"{prefix}{index:03d}{self.extension}"
+        )
+
+    def _shard_index(self, movie: dict) -> int:
+        """Return the shard a movie belongs to. crc32 is used instead of
+        `hash` because it is stable between interpreter runs."""
+        if self.shard_key == "decade":
+            return (int(movie[YEAR]) // 10) % self.shard_count
+        return zlib.crc32(str(movie[ID]).encode("utf-8")) % self.shard_count
+
+    def _fan_out(self, function) -> list:
+        """Call `function` with every shard in parallel and return
+        the results in shard order."""
+        with ThreadPoolExecutor(max_workers=self.shard_count) as executor:
+            return list(executor.map(function, self.shards))
+
+    def get_movie_data(self) -> list[dict]:
+        movies = []
+        for shard_movies in self._fan_out(
+            lambda shard: shard.get_movie_data()
+        ):
+            movies.extend(shard_movies)
+        return movies
+
+    def _list_movies(self) -> dict[str, dict]:
+        movie_dict = {}
+        for shard_dict in self._fan_out(lambda shard: shard._list_movies()):
+            movie_dict.update(shard_dict)
+        return movie_dict
+
+    def _add_movie(
+        self, title, year, rating, poster, imdb_id, details=None
+    ) -> None:
+        movie = {YEAR: year, ID: imdb_id}
+        with self.write_lock:
+            shard = self.shards[self._shard_index(movie)]
+            shard._add_movie(title, year, rating, poster, imdb_id, details)
+
+    def _delete_movie(self, title: str) -> None:
+        def contains_title(shard) -> bool:
+            return any(
+                movie[TITLE].lower() == title.lower()
+                for movie in shard.get_movie_data()
+            )
+
+        with self.write_lock:
+            matches = self._fan_out(contains_title)
+            for shard, found in zip(self.shards, matches):
+                if found:
+                    shard._delete_movie(title)
+
+    def _save_movies(self, movies) -> None:
+        """Distribute movies over the shards and save every shard.
+
+        Arguments:
+            movies -- list of all movies
+        """
+        with self.write_lock:
+            shard_movies = [[] for _ in range(self.shard_count)]
+            for movie in movies:
+                shard_movies[self._shard_index(movie)].append(movie)
+
+            with ThreadPoolExecutor(max_workers=self.shard_count) as executor:
+                list(executor.map(
+                    lambda args: args[0]._save_movies(args[1]),
+                    zip(self.shards, shard_movies),
+                ))
+
+    def rebalance(self, shard_count: int, shard_key=None) -> None:
+        """Redistribute all movies over `shard_count` shards,
+        optionally switching the shard key.
+
+        The new shards get new file names and the manifest is replaced
+        once they are all saved. Only then the old shards are deleted, so
+        a failed rebalance leaves the old layout intact.
+
+        Raises:
+            ValueError: If shard count or shard key are invalid.
+        """
+        shard_key = shard_key or self.shard_key
+        if shard_count < 1:
+            raise ValueError("Shard count must be at least 1!")
+        if shard_key not in SHARD_KEYS:
+            raise ValueError(f"Shard key must be one of {SHARD_KEYS}!")
+
+        with self.write_lock:
+            movies = self.get_movie_data()
+            old_layout = (
+                self.shard_count,
+                self.shard_key,
+                self.generation,
+                self.shards,
+            )
+
+            self.shard_count = shard_count
+            self.shard_key = shard_key
+            self.generation += 1
+            new_paths = [
+                self._shard_path(index) for index in range(shard_count)
+            ]
+            try:
+                self.shards = self._open_shards()
+                self._save_movies(movies)
+                # the new layout is in use once the manifest names it
+                self._save_manifest()
+            except BaseException:
+                (
+                    self.shard_count,
+                    self.shard_key,
+                    self.generation,
+                    self.shards,
+                ) = old_layout
+                for path in new_paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+
+            for shard in old_layout[3]:
+                os.remove(shard.file_path)
+
+    def last_modified(self) -> float:
+        return max(
+            os.path.getmtime(self.manifest_path),
+            *(shard.last_modified() for shard in self.shards),
+        )
@@ -0,0 +1,121 @@
+"""
+Prefix index over movie titles for search-as-you-type completion.
+
+Casefolded titles are kept in a sorted array, all titles starting with a
+prefix form one contiguous slice that is found with two binary searches.
+Suggestions are the best rated titles of that slice. Adding and deleting
+movies updates the array in place instead of rebuilding it.
+
+Usage:
+    index = TitleIndex(movies)
+    index.suggest("star w")  # ['Star Wars', ...]
+"""
+
+import heapq
+from bisect import bisect_left, insort
+
+from storage.istorage import RATING, TITLE
+
+DEFAULT_SUGGESTIONS = 10
+# sorts after every character, closes the slice of a prefix
+MAX_CHAR = "\U0010ffff"
+
+
+class TitleIndex:
+    """Sorted array of (casefolded title, title) with ratings.
+
+    Attributes:
+        entries (list): Sorted (casefolded title, title) pairs.
+        ratings (dict): Maps titles to their rating.
+    """
+
+    def __init__(self, movies=()) -> None:
+        self.ratings = {movie[TITLE]: movie[RATING] for movie in movies}
+        self.entries = sorted(
+            (title.casefold(), title) for title in self.ratings
+        )
+        # suggestions of recent prefixes, typing reuses them per keystroke
+        self.cache = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.ratings
+
+    def add(self, title: str, rating: float) -> None:
+        key = title.casefold()
+        if title in self.ratings:
+            self.ratings[title] = rating
+            self._drop_cached(key)
+        else:
+            insort(self.entries, (key, title))
+            self.ratings[title] = rating
+            self._add_cached(key, title, rating)
+
+    def remove(self, title: str) -> None:
+        """Remove `title`, matched case insensitively like
+        the storages delete movies."""
+        key = title.casefold()
+        position = bisect_left(self.entries, (key,))
+        while (
+            position < len(self.entries) and self.entries[position][0] == key
+        ):
+            _, stored_title = self.entries.pop(position)
+            del self.ratings[stored_title]
+        self._drop_cached(key)
+
+    def _add_cached(self, key: str, title: str, rating: float) -> None:
+        """Insert a new title into the cached suggestions it belongs to,
+        so the cache stays warm while movies are added."""
+        for (prefix, limit), titles in self.cache.items():
+            if not key.startswith(prefix):
+                continue
+            if len(titles) < limit or rating > self.ratings[titles[-1]]:
+                titles.append(title)
+                titles.sort(key=self.ratings.get, reverse=True)
+                del titles[limit:]
+
+    def _drop_cached(self, key: str) -> None:
+        """Forget cached suggestions that may contain the title `key`."""
+        outdated = [
+            cache_key
+            for cache_key in self.cache
+            if key.startswith(cache_key[0])
+        ]
+        for cache_key in outdated:
+            del self.cache[cache_key]
+
+    def find(self, title: str) -> str | None:
+        """Return the stored spelling of a title, ignoring case."""
+        key = title.casefold()
+        position = bisect_left(self.entries, (key,))
+        if position < len(self.entries) and self.entries[position][0] == key:
+            return self.entries[position][1]
+        return None
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        """Return the slice of entries starting with `prefix`."""
+        key = prefix.casefold()
+        start = bisect_left(self.entries, (key,))
+        end = bisect_left(self.entries, (key + MAX_CHAR,), start)
+        return start, end
+
+    def suggest(self, prefix: str, limit=DEFAULT_SUGGESTIONS) -> list[str]:
+        """Return up to `limit` titles starting with `prefix`,
+        the best rated first."""
+        cache_key = (prefix.casefold(), limit)
+        if cache_key in self.cache:
+            return list(self.cache[cache_key])
+
+        start, end = self.prefix_range(prefix)
+        titles = [title for _, title in self.entries[start:end]]
+        if len(titles) > limit:
+            titles = heapq.nlargest(limit, titles, key=self.ratings.get)
+        else:
+            titles.sort(key=self.ratings.get, reverse=True)
+
+        if len(self.cache) > 1000:
+            self.cache.clear()
+        self.cache[cache_key] = titles
+        return list(titles)
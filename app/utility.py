@@ -3,14 +3,33 @@ Utility module for printing colored text in the terminal and pausing execution.
 
 Functions:
 - print_color(text: str, color: str) -> None: Prints text in red, green, or blue.
+- set_color(enabled: bool) -> None: Turns colored output on or off.
 - enter_to_continue() -> None: Prompts user to press Enter to continue.
+- input_with_completion(prompt: str, suggest) -> str: Prompts with tab-completion.
 """
 
 from colorama import Fore, Style
 
+try:
+    import readline
+except ImportError:  # not available on Windows
+    readline = None
+
+# colors are skipped for plain terminals and piped output (--no-color)
+USE_COLOR = True
+
+
+def set_color(enabled: bool) -> None:
+    """Turn colored output of `print_color` on or off."""
+    global USE_COLOR
+    USE_COLOR = enabled
+
 
 def print_color(text: str, color: str) -> None:
     """Print colored text in terminal: red, green, and blue!"""
+    if not USE_COLOR:
+        print(text)
+        return
     color_translator = {
         "red": Fore.RED,
         "green": Fore.GREEN,
@@ -24,3 +43,33 @@ def enter_to_continue() -> None:
     print("")
     input("Press enter to continue")
     print("")
+
+
+def input_with_completion(prompt: str, suggest) -> str:
+    """Prompt for input, pressing tab completes the whole line with the
+    strings returned by `suggest(text)`. Falls back to a plain `input`
+    where readline is not available."""
+    if readline is None:
+        return input(prompt)
+
+    matches = []
+
+    def complete(text: str, state: int):
+        if state == 0:
+            matches[:] = suggest(text) if text else []
+        return matches[state] if state < len(matches) else None
+
+    previous_completer = readline.get_completer()
+    previous_delims = readline.get_completer_delims()
+    readline.set_completer(complete)
+    # complete the whole line, titles contain spaces and punctuation
+    readline.set_completer_delims("")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    try:
+        return input(prompt)
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
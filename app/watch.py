@@ -0,0 +1,254 @@
+"""
+Watch mode, regenerates the website whenever the database changes.
+
+The database is watched with inotify on Linux and by polling file sizes and
+modification times elsewhere. A burst of writes, like a script adding many
+movies, is debounced into a single rebuild: the website is rebuilt once no
+change arrived for the debounce time. Rebuilds re-render only the cards of
+changed movies and skip writing the page if nothing visible changed.
+
+Usage:
+    Call `watch(storage, title)`, stop it with Ctrl+C.
+"""
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import time
+
+import utility as helper
+from website import WEBSITE, WebsiteGenerator
+
+DEBOUNCE_SECONDS = 0.5
+# rebuild at the latest after this long, even if writes keep coming
+MAX_DELAY_SECONDS = 5.0
+POLL_INTERVAL = 1.0
+# a failed rebuild is retried after this long if no change came first
+RETRY_SECONDS = 2.0
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Waits for files of a directory to be written, moved in or deleted.
+
+    Attributes:
+        names (set | None): File names to react to, None for all files.
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE
+
+    def __init__(self, directory: str, names=None) -> None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.names = names
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watch = libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), self.MASK
+        )
+        if watch < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"Cannot watch '{directory}'")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Return True once a watched file changed, False after `timeout`
+        seconds without a change."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return False
+            if self._read_events():
+                return True
+
+    def _read_events(self) -> bool:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if self.names is None or name in self.names:
+                changed = True
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Detects changes by comparing sizes and modification times."""
+
+    def __init__(self, directory: str, names=None) -> None:
+        self.directory = directory
+        self.names = names
+        self.signature = self._signature()
+
+    def _signature(self) -> frozenset:
+        files = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self.names is not None and entry.name not in self.names:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.add((entry.name, stat.st_mtime_ns, stat.st_size))
+        return frozenset(files)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Return True once a watched file changed, False after `timeout`
+        seconds without a change."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signature = self._signature()
+            if signature != self.signature:
+                self.signature = signature
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            delay = POLL_INTERVAL
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(storage, polling: bool = False):
+    """Return an inotify watcher for the files of `storage`, or a polling
+    watcher if inotify is not available or `polling` is set."""
+    if hasattr(storage, "directory"):
+        # sharded storage, every shard and the manifest count
+        directory, names = storage.directory, None
+    else:
+        directory = os.path.dirname(storage.file_path) or "."
+        names = {os.path.basename(storage.file_path)}
+
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory, names)
+        except (AttributeError, OSError):
+            pass
+    return PollingWatcher(directory, names)
+
+
+def wait_for_changes(watcher, debounce: float = DEBOUNCE_SECONDS) -> None:
+    """Block until the database changed and then stayed unchanged
+    for `debounce` seconds, or `MAX_DELAY_SECONDS` passed."""
+    watcher.wait()
+    deadline = time.monotonic() + MAX_DELAY_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not watcher.wait(min(debounce, remaining)):
+            return
+
+
+class SiteBuilder:
+    """Rebuilds the website of a storage when its database was saved.
+
+    Attributes:
+        last_modified (float | None): Database version of the last build.
+        page (str | None): HTML of the last written website.
+    """
+
+    def __init__(self, storage, title: str, path: str = WEBSITE) -> None:
+        self.storage = storage
+        self.title = title
+        self.path = path
+        self.generator = WebsiteGenerator()
+        self.last_modified = None
+        self.page = None
+
+    def rebuild(self) -> bool:
+        """Render the website if the database changed since the last build
+        and write it if it looks different, logging the time it took.
+
+        Returns:
+            bool: False if the database is missing, for example while a
+            sharded library is rebalanced, so the build is retried.
+        """
+        try:
+            last_modified = self.storage.last_modified()
+        except FileNotFoundError:
+            helper.print_color("Database was removed, waiting for it.", "red")
+            return False
+        if last_modified == self.last_modified:
+            return True
+
+        start = time.perf_counter()
+        rendered = self.generator.cards_rendered
+        try:
+            movies = self.storage.get_movie_data()
+        except FileNotFoundError as error:
+            # saves rename a new file over the database, it is never torn,
+            # but it or a shard can be missing for a moment
+            helper.print_color(
+                f"{time.strftime('%H:%M:%S')} cannot read the database "
+                + f"yet, retrying: {error}",
+                "red",
+            )
+            return False
+        page = self.generator.render_index(self.title, movies)
+        rendered = self.generator.cards_rendered - rendered
+        if page != self.page:
+            with open(self.path, "w") as file:
+                file.write(page)
+            self.page = page
+            result = f"rebuilt {self.path}"
+        else:
+            result = f"{self.path} unchanged"
+        self.last_modified = last_modified
+
+        milliseconds = (time.perf_counter() - start) * 1000
+        print(
+            f"{time.strftime('%H:%M:%S')} {result}: {len(movies)} movies, "
+            + f"{rendered} cards rendered in {milliseconds:.0f} ms"
+        )
+        return True
+
+
+def watch(
+    storage,
+    title: str,
+    path: str = WEBSITE,
+    debounce: float = DEBOUNCE_SECONDS,
+    polling: bool = False,
+) -> None:
+    """Build the website and rebuild it on every database change
+    until interrupted with Ctrl+C."""
+    builder = SiteBuilder(storage, title, path)
+    watcher = create_watcher(storage, polling)
+    method = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"Watching the database ({method}), press Ctrl+C to stop.")
+    try:
+        built = builder.rebuild()
+        while True:
+            if built:
+                wait_for_changes(watcher, debounce)
+            else:
+                # retry soon, or once the writer is done
+                watcher.wait(RETRY_SECONDS)
+            built = builder.rebuild()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
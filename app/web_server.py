@@ -0,0 +1,185 @@
+"""
+Built-in HTTP server for the movie website.
+
+Instead of a static `index.html` that goes stale, the page is rendered from
+the templates on demand. The rendered page is cached in memory together with
+its gzip-compressed variant and re-rendered only when the storage was saved
+since. Responses carry ETag and Last-Modified headers and conditional
+requests are answered with 304 Not Modified. Every client is handled in its
+own thread.
+
+Usage:
+    Call `serve(storage, host, port, title)`.
+"""
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from website import WebsiteGenerator
+
+STYLESHEET = "static/style.css"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_TITLE = "My Movies"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    gzip_body: bytes
+    content_type: str
+    etag: str
+    last_modified: float
+
+    @classmethod
+    def create(cls, body: bytes, content_type: str, last_modified: float):
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        return cls(
+            body, gzip.compress(body), content_type, etag, last_modified
+        )
+
+
+class SiteCache:
+    """Keeps the rendered pages until the storage changes.
+
+    Attributes:
+        storage: The movie storage the page is rendered from.
+        title (str): Heading of the website.
+    """
+
+    def __init__(self, storage, title: str = DEFAULT_TITLE) -> None:
+        self.storage = storage
+        self.title = title
+        self.generator = WebsiteGenerator()
+        self.lock = threading.Lock()
+        self.page = None
+        with open(STYLESHEET, "rb") as file:
+            self.stylesheet = CachedResponse.create(
+                file.read(), "text/css; charset=utf-8", 0
+            )
+
+    def get_page(self) -> CachedResponse:
+        """Return the cached page, rendering it again if the storage
+        was saved after it was rendered."""
+        last_modified = self.storage.last_modified()
+        page = self.page
+        if page is not None and page.last_modified == last_modified:
+            return page
+
+        # a single thread renders, the others wait for its result
+        with self.lock:
+            if self.page is None or self.page.last_modified != last_modified:
+                html = self.generator.render_index(
+                    self.title, self.storage.get_movie_data()
+                )
+                self.page = CachedResponse.create(
+                    html.encode("utf-8"),
+                    "text/html; charset=utf-8",
+                    last_modified,
+                )
+            return self.page
+
+
+class MovieSiteHandler(BaseHTTPRequestHandler):
+    """Serves the movie page and its stylesheet from a `SiteCache`."""
+
+    cache: SiteCache = None
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, with Nagle's algorithm
+    # small keep-alive responses would wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool) -> None:
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/index.html"):
+            response = self.cache.get_page()
+        elif path == "/style.css":
+            response = self.cache.stylesheet
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        if self._is_not_modified(response):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(response)
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        body = response.gzip_body if use_gzip else response.body
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(response)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_cache_headers(self, response: CachedResponse) -> None:
+        self.send_header("ETag", response.etag)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "no-cache")
+        if response.last_modified:
+            self.send_header(
+                "Last-Modified",
+                formatdate(response.last_modified, usegmt=True),
+            )
+
+    def _is_not_modified(self, response: CachedResponse) -> bool:
+        """Check the conditional request headers, If-None-Match wins
+        over If-Modified-Since."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            etags = [etag.strip() for etag in if_none_match.split(",")]
+            return "*" in etags or response.etag in etags
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and response.last_modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            # HTTP dates have a resolution of one second
+            return int(response.last_modified) <= since
+        return False
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def create_server(
+    storage, host=DEFAULT_HOST, port=DEFAULT_PORT, title=DEFAULT_TITLE
+) -> ThreadingHTTPServer:
+    """Create a threaded server for the movie website of `storage`."""
+    handler = type(
+        "BoundMovieSiteHandler",
+        (MovieSiteHandler,),
+        {"cache": SiteCache(storage, title)},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(
+    storage, host=DEFAULT_HOST, port=DEFAULT_PORT, title=DEFAULT_TITLE
+) -> None:
+    """Serve the movie website until interrupted with Ctrl+C."""
+    with create_server(storage, host, port, title) as server:
+        print(f"Serving movie website on http://{host}:{port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
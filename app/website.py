@@ -0,0 +1,96 @@
+"""
+Renders the movie website from the HTML templates.
+
+The `WebsiteGenerator` loads the page and movie card templates once and
+fills them with movie data. It is used to write `static/index.html`, by
+the built-in web server to render pages on demand and by watch mode to
+rebuild the page when the database changes. Rendered movie cards are
+cached, so a rebuild only renders the cards of changed movies.
+"""
+
+import re
+
+INDEX_TEMPLATE = "static/templates/index_template.html"
+MOVIE_TEMPLATE = "static/templates/movie_template.html"
+WEBSITE = "static/index.html"
+
+
+def fill_template(template: str, translation_table: dict[str, str]) -> str:
+    """Replace all placeholders of `translation_table` in one pass."""
+    return re.sub(
+        "|".join([word for word in translation_table]),
+        lambda x: translation_table[x.group()],
+        template,
+    )
+
+
+class WebsiteGenerator:
+    """Fills the website templates with movies.
+
+    Attributes:
+        index_template (str): HTML of the page.
+        movie_template (str): HTML of a single movie card.
+        card_cache (dict): Cards of the last rendered grid by their content.
+        cards_rendered (int): Number of cards rendered, cache hits excluded.
+    """
+
+    def __init__(
+        self, index_template=INDEX_TEMPLATE, movie_template=MOVIE_TEMPLATE
+    ) -> None:
+        with open(index_template, "r") as file:
+            self.index_template = file.read()
+        with open(movie_template, "r") as file:
+            self.movie_template = file.read()
+        self.card_cache = {}
+        self.cards_rendered = 0
+
+    def render_movie(self, movie: dict) -> str:
+        """Return the HTML card of a single movie."""
+        return fill_template(
+            self.movie_template,
+            {
+                "__POSTER__": movie["Poster"],
+                "__TITLE__": movie["Title"],
+                "__YEAR__": str(movie["Year"]),
+                "__STARS__": round(int(movie["Rating"] // 2)) * "⭐",
+                "__LINK__": movie["ID"],
+            },
+        )
+
+    def render_movie_grid(self, movies: list[dict]) -> str:
+        """Return the combined HTML of all movie cards. Cards of movies
+        that did not change since the last call come from the cache."""
+        cache = {}
+        cards = []
+        for movie in movies:
+            key = (
+                movie["Poster"],
+                movie["Title"],
+                movie["Year"],
+                movie["Rating"],
+                movie["ID"],
+            )
+            card = self.card_cache.get(key) or cache.get(key)
+            if card is None:
+                card = self.render_movie(movie)
+                self.cards_rendered += 1
+            cache[key] = card
+            cards.append(card)
+        # keep only cards of the current library
+        self.card_cache = cache
+        return "".join(cards)
+
+    def render_index(self, title: str, movies: list[dict]) -> str:
+        """Return the complete website with heading and movie grid."""
+        return fill_template(
+            self.index_template,
+            {
+                "__TEMPLATE_TITLE__": title,
+                "__TEMPLATE_MOVIE_GRID__": self.render_movie_grid(movies),
+            },
+        )
+
+    def write_index(self, title: str, movies: list[dict], path=WEBSITE):
+        """Render the website and save it to `path`."""
+        with open(path, "w") as file:
+            file.write(self.render_index(title, movies))